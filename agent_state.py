@@ -0,0 +1,105 @@
+"""
+Compact agent state and a memory report per agent type.
+
+The parameters that are equal for every agent of a group (increments, bounds, productivities, ...)
+are kept once per group and simulation with SharedParameters.share instead of once per agent, so an
+agent's __dict__ holds only its own mutable state and a reference to the parameters of its group. abce agents always have a __dict__, so __slots__ do not
+apply to them; at 10^5 firms the firm sector is run as rows of group-level arrays instead
+(fast_firms.FirmPopulation, engine='fast'). memory_report measures both.
+"""
+import sys
+import weakref
+import numpy as np
+import pandas as pd
+
+
+class Parameters:
+    """
+    the shared parameters of one agent group of one simulation
+    """
+    def __init__(self, **parameters):
+        self.__dict__.update(parameters)
+
+
+# (run, group) -> Parameters of the process, an entry lives as long as agents hold it
+_shared = weakref.WeakValueDictionary()
+
+
+class SharedParameters:
+    """
+    Mixin for abce agents: the agents of a group in one simulation hold one Parameters object, reading
+    a shared parameter with self.name works as before. Simulations in the same process have their own
+    parameters. They are set again from the parameters when a simulation is built, so checkpoints leave
+    them out.
+    """
+    _not_checkpointed = ('_parameters',)
+
+    def share(self, run_id, **parameters):
+        """
+        shares parameters with the other agents of the group in the simulation run_id
+        """
+        key = (run_id, self.group)
+        shared = _shared.get(key)
+        if shared is None:
+            shared = _shared[key] = Parameters(**parameters)
+        else:
+            shared.__dict__.update(parameters)
+        self._parameters = shared
+
+    def __getattr__(self, name):
+        shared = self.__dict__.get('_parameters')
+        if shared is not None and name in shared.__dict__:
+            return shared.__dict__[name]
+        raise AttributeError('%r object has no attribute %r' % (type(self).__name__, name))
+
+    def set_parameters(self, **parameters):
+        """
+        changes parameters during a run, e.g. in a scenario branch (see scenarios.py): the shared parameters
+        of the group and the agent's own attributes of the same names, the other names are ignored
+        """
+        shared = self._parameters.__dict__
+        for key, value in parameters.items():
+            if key in shared:
+                shared[key] = value
+            elif key in self.__dict__:
+                setattr(self, key, value)
+
+    def memory_usage(self):
+        """
+        returns (group, bytes of the model's own attributes, bytes of the shared parameters)
+
+        The sizes are shallow: the attribute dictionary and every value in it, without following
+        references.
+        """
+        abce_attributes = getattr(self, '_abce_attributes', ())
+        own = {key: value for key, value in self.__dict__.items() if key not in abce_attributes}
+        own_bytes = sys.getsizeof(own) + sum(sys.getsizeof(value) for value in own.values())
+        shared_bytes = sum(sys.getsizeof(value) for value in self._parameters.__dict__.values())
+        return self.group, own_bytes, shared_bytes
+
+
+def memory_report(groups):
+    """
+    returns one row per agent type with the number of agents, the bytes per agent and in total, and the
+    bytes of the parameters the agents of a group share
+    """
+    usage = pd.DataFrame([row for group in groups for row in group.memory_usage()],
+                         columns=['group', 'bytes', 'shared_bytes'])
+    report = usage.groupby('group').agg(agents=('bytes', 'size'),
+                                        bytes_per_agent=('bytes', 'mean'),
+                                        total_bytes=('bytes', 'sum'),
+                                        shared_bytes=('shared_bytes', 'max'))
+    return report.sort_values('total_bytes', ascending=False)
+
+
+def array_memory_report(population, group='firm'):
+    """
+    the memory report of a struct-of-arrays population such as fast_firms.FirmPopulation
+    """
+    total = sum(value.nbytes for value in vars(population).values() if isinstance(value, np.ndarray))
+    shared = sum(sys.getsizeof(value) for value in vars(population).values()
+                 if not isinstance(value, np.ndarray))
+    return pd.DataFrame({'agents': [population.number],
+                         'bytes_per_agent': [total / max(population.number, 1)],
+                         'total_bytes': [total],
+                         'shared_bytes': [shared]}, index=pd.Index([group], name='group'))
@@ -0,0 +1,126 @@
+"""
+Scaling benchmark of the economy model.
+
+Every case of a grid of sizes is run by main.main with the profiler switched on, in a fresh process
+so that the peak resident memory belongs to that case alone. A case reports the days per second, the
+peak RSS, the time of every phase and agent group, the messages and the calls. The results are
+written as JSON and compared against a saved baseline, a case whose throughput fell or whose memory
+grew by more than the tolerance is flagged as a regression.
+
+    python benchmark.py results.json [baseline.json]
+"""
+import json
+import multiprocessing
+import resource
+import sys
+import time
+
+
+SIZE_KEYS = ('num_firms', 'num_farms', 'population', 'num_days')
+
+GRID = [dict(num_firms=20, num_farms=20, population=10000, num_days=1300),
+        dict(num_firms=200, num_farms=200, population=100000, num_days=400),
+        dict(num_firms=2000, num_farms=2000, population=1000000, num_days=100),
+        dict(num_firms=10000, num_farms=10000, population=10000000, num_days=30),
+        dict(num_firms=50000, num_farms=50000, population=50000000, num_days=10)]
+
+
+def case_key(case):
+    return '%s:%s' % (case.get('engine', 'abce'), '/'.join(str(case[key]) for key in SIZE_KEYS))
+
+
+def peak_rss_mb():
+    """
+    returns the peak resident memory of this process in megabytes (ru_maxrss is in kilobytes on linux)
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_case(params):
+    """
+    runs one case in the current process and returns its measurements
+    """
+    from main import main
+    import pandas as pd
+
+    start = time.perf_counter()
+    result = main(params)
+    seconds = time.perf_counter() - start
+    measurements = {'key': case_key(params),
+                    'sizes': {key: params[key] for key in SIZE_KEYS},
+                    'engine': params['engine'],
+                    'seconds': seconds,
+                    'days_per_second': params['num_days'] / seconds,
+                    'peak_rss_mb': peak_rss_mb(),
+                    'phases': {},
+                    'messages': 0,
+                    'calls': 0}
+    if params['engine'] == 'abce':
+        with open(result + '/profile.json') as f:
+            totals = pd.DataFrame(json.load(f)['totals'])
+        measurements['phases'] = {'%s/%s' % (row['phase'], row['group']): row['seconds']
+                                  for _, row in totals.iterrows()}
+        measurements['phases']['other'] = seconds - totals['seconds'].sum()
+        measurements['messages'] = int(totals['messages'].sum())
+        measurements['calls'] = int(totals['calls'].sum())
+    return measurements
+
+
+def run_grid(params, grid=GRID):
+    """
+    runs every case of the grid in a fresh process
+
+    Args:   params = the parameters of the simulation, as in main.py, the sizes are taken from the grid
+            grid = list of dictionaries with num_firms, num_farms, population and num_days
+
+    Returns: the list of the measurements of the cases
+    """
+    results = []
+    for sizes in grid:
+        case = dict(params, profile=True, graphs=[], **sizes)
+        with multiprocessing.Pool(1, maxtasksperchild=1) as pool:
+            results.append(pool.apply(run_case, (case,)))
+        print('%-40s %8.2f days/s %8.1f MB' % (results[-1]['key'], results[-1]['days_per_second'],
+                                              results[-1]['peak_rss_mb']))
+    return results
+
+
+def write(filename, results):
+    with open(filename, 'w') as f:
+        json.dump({'cases': results}, f, indent=1)
+
+
+def read(filename):
+    with open(filename) as f:
+        return json.load(f)['cases']
+
+
+def compare(results, baseline, tolerance=0.2):
+    """
+    compares the measurements against a baseline, cases are matched by engine and sizes
+
+    Returns: list of (key, measure, baseline value, value) of the regressions, the days per second that
+             fell or the peak RSS that grew by more than the tolerance
+    """
+    baseline = {case['key']: case for case in baseline}
+    regressions = []
+    for case in results:
+        if case['key'] not in baseline:
+            continue
+        old = baseline[case['key']]
+        if case['days_per_second'] < old['days_per_second'] * (1 - tolerance):
+            regressions.append((case['key'], 'days_per_second', old['days_per_second'], case['days_per_second']))
+        if case['peak_rss_mb'] > old['peak_rss_mb'] * (1 + tolerance):
+            regressions.append((case['key'], 'peak_rss_mb', old['peak_rss_mb'], case['peak_rss_mb']))
+    return regressions
+
+
+if __name__ == '__main__':
+    from main import params
+    results = run_grid(dict(params, log_backend='columnar'))
+    write(sys.argv[1] if len(sys.argv) > 1 else 'benchmark.json', results)
+    if len(sys.argv) > 2:
+        regressions = compare(results, read(sys.argv[2]))
+        for key, measure, old, new in regressions:
+            print('REGRESSION %s %s: %.2f -> %.2f' % (key, measure, old, new))
+        sys.exit(1 if regressions else 0)
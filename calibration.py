@@ -0,0 +1,174 @@
+"""
+Parallel calibration of the parameters against target moments.
+
+The search draws a Latin hypercube of candidates inside the bounds of the calibrated parameters and
+then refines locally: every round draws a smaller hypercube around the best candidates so far. Every
+candidate is run for the same seeds, and as every agent draws from its own stream (rng.py) the
+candidates see common random numbers and differ only by their parameters. The (candidate, seed)
+runs are spread across a process pool and can be served by a ResultCache. A candidate's score is the
+weighted sum of the squared relative distances of its moments, averaged over the seeds, to the targets.
+Moments are registered with @moment.
+"""
+import multiprocessing
+import numpy as np
+import pandas as pd
+import rng
+
+
+MOMENTS = {}
+
+
+def moment(name):
+    def register(function):
+        MOMENTS[name] = function
+        return function
+    return register
+
+
+@moment('wage_share')
+def wage_share(aggregates):
+    """
+    the mean share of the wages in the payments of the firms, see Firm.destroy_unused_labor
+    """
+    return aggregates['wage_share'].mean()
+
+
+@moment('price_volatility')
+def price_volatility(aggregates):
+    """
+    the standard deviation of the daily log changes of the mean price
+    """
+    return np.log(aggregates['price']).diff().std()
+
+
+@moment('farm_sales')
+def farm_sales(aggregates):
+    """
+    the mean daily sales of the farms, only the abce engine simulates farms
+    """
+    return aggregates['farm_sales'].mean() if 'farm_sales' in aggregates else np.nan
+
+
+@moment('mean_price')
+def mean_price(aggregates):
+    return aggregates['price'].mean()
+
+
+@moment('mean_wage')
+def mean_wage(aggregates):
+    return aggregates['firm_wage'].mean()
+
+
+def latin_hypercube(bounds, number, generator):
+    """
+    draws a Latin hypercube sample: every parameter's range is cut into `number` strata and every
+    stratum is used once
+
+    Args:   bounds = dictionary parameter -> (low, high), parameters with integer bounds stay integers
+
+    Returns: list of dictionaries of the parameters
+    """
+    names = list(bounds)
+    low = np.array([bounds[name][0] for name in names], dtype=float)
+    high = np.array([bounds[name][1] for name in names], dtype=float)
+    strata = np.argsort(generator.random((number, len(names))), axis=0)
+    unit = (strata + generator.random((number, len(names)))) / number
+    values = low + unit * (high - low)
+    samples = []
+    for row in values:
+        sample = {}
+        for name, value in zip(names, row):
+            integer = all(isinstance(bound, (int, np.integer)) for bound in bounds[name])
+            sample[name] = int(round(value)) if integer else float(value)
+        samples.append(sample)
+    return samples
+
+
+def evaluate(args):
+    """
+    runs one candidate with one seed and returns its moments
+    """
+    index, params, seed, burn_in, moments, cache = args
+    if cache is None:
+        from result_cache import simulate_result
+        result = simulate_result(dict(params, seed=seed))
+    else:
+        result = cache.run(params, seed)
+    aggregates = result['aggregates'].iloc[burn_in:]
+    return index, {name: MOMENTS[name](aggregates) for name in moments}
+
+
+def score(moments, targets, weights=None):
+    """
+    returns the weighted sum of the squared relative distances of the moments to the targets
+    """
+    weights = weights or {}
+    distances = [weights.get(name, 1) * ((moments[name] - target) / (abs(target) or 1)) ** 2
+                 for name, target in targets.items()]
+    return float(np.sum(distances))
+
+
+def calibrate(params, bounds, targets, seeds=range(4), samples=64, refinements=3, keep=4, shrink=0.5,
+              weights=None, burn_in=365, processes=None, cache=None, search_seed=0):
+    """
+    calibrates the parameters in bounds so that the moments of the simulation match the targets
+
+    Args:   params = the parameters of the simulation, as in main.py
+            bounds = dictionary parameter -> (low, high) of the calibrated parameters
+            targets = dictionary moment -> target value, see MOMENTS
+            seeds = the seeds every candidate is run with, common to all candidates
+            samples = the number of candidates of the hypercube and of every refinement round
+            refinements = the number of local refinement rounds
+            keep = the number of best candidates a refinement round searches around
+            shrink = the factor the search box shrinks by in every round
+            weights = dictionary moment -> weight, 1 by default
+            burn_in = the number of days at the start of a run the moments ignore
+            cache = a result_cache.ResultCache or None
+
+    Returns: a DataFrame with one row per candidate, its parameters, mean moments, score and round,
+             the best candidate first
+    """
+    generator = rng.group_stream(search_seed, 'calibration')
+    seeds = list(seeds)
+    moments = list(targets)
+    candidates = []
+    widths = {name: (high - low) / 2 for name, (low, high) in bounds.items()}
+    with multiprocessing.Pool(processes) as pool:
+        for refinement in range(refinements + 1):
+            if refinement == 0:
+                batch = latin_hypercube(bounds, samples, generator)
+            else:
+                widths = {name: width * shrink for name, width in widths.items()}
+                batch = []
+                for _, center in pd.DataFrame(candidates).nsmallest(keep, 'score').iterrows():
+                    local = {name: _clip(center[name], widths[name], bounds[name]) for name in bounds}
+                    batch.extend(latin_hypercube(local, max(1, samples // keep), generator))
+            first = len(candidates)
+            candidates.extend(dict(candidate, round=refinement) for candidate in batch)
+            tasks = [(first + i, dict(params, **candidate), seed, burn_in, moments, cache)
+                     for i, candidate in enumerate(batch) for seed in seeds]
+            results = {}
+            for index, values in pool.imap_unordered(evaluate, tasks):
+                results.setdefault(index, []).append(values)
+            for index, values in results.items():
+                mean = pd.DataFrame(values).mean().to_dict()
+                candidates[index].update(mean)
+                candidates[index]['score'] = score(mean, targets, weights)
+    return pd.DataFrame(candidates).sort_values('score').reset_index(drop=True)
+
+
+def _clip(center, width, bound):
+    low, high = bound
+    lower, upper = max(low, center - width), min(high, center + width)
+    if all(isinstance(value, (int, np.integer)) for value in bound):
+        return int(np.floor(lower)), int(np.ceil(upper))
+    return float(lower), float(upper)
+
+
+if __name__ == '__main__':
+    from main import params
+    result = calibrate(dict(params, engine='fast', num_days=1300),
+                       bounds={'wage_increment': (0.001, 0.05), 'price_increment': (0.001, 0.05),
+                               'phi_upper': (5, 20), 'phi_lower': (1, 4), 'excess': (1.01, 1.5), 'l': (0.2, 0.8)},
+                       targets={'wage_share': 0.6, 'price_volatility': 0.005})
+    print(result.head(10))
@@ -1,3 +1,8 @@
+import numpy as np
+import tracing
+from demand import price_vector, price_index, ces_demand
+
+
 class Capitalists:
 
     def init(self, capitalists_money, capitalist_population, **_):
@@ -17,40 +22,44 @@ class Capitalists:
         """
         returns the parameter q as defined in the C-D utility function
         """
-        L = self.l
-        q = 0
-        for id in range(self.num_firms):
-            q += self.price_dict[('firm', id)] ** (L / (L - 1))
-        q = float(q) ** ((L - 1) / L)
-        return q
+        return price_index(price_vector(self.price_dict, 'firm', self.num_firms), self.l)
 
     def buy_goods(self):
         """
-        Calculates the demand from each firm and makes buy offers for produce of this amount at this value, or as much
-        as the people can afford
+        Calculates the demand from each firm and bids for produce of this amount at this value, the bids are
+        cleared by goods_market.clear_bids
 
         Args:   q, l parameters as defined in the C-D utility function
                 firm_price = the price the firm is selling the goods for
                 firm_id = the number of the firm the people are trading with
+
+        Returns: (name, demand vector, price vector), the vectors are ordered by firm id
         """
-        q = self.find_q()
-        print("q", q)
+        prices = price_vector(self.price_dict, 'firm', self.num_firms)
+        q = price_index(prices, self.l)
+        tracing.debug('q %s', q)
         self.log('q', q)
 
-        demand_list = []
-        l = self.l
-        print("monsey", self["money"], self.not_reserved("money"))
         I = self.not_reserved('money')
+        if tracing.debugging:
+            tracing.debug('money %s not reserved %s', self["money"], I)
         assert np.isfinite(I)
-        for firm in range(self.num_firms):  # fix systematic advantage for 0 firm
-            firm_price = float(self.price_dict['firm', firm])
-            demand = (I / q) * (q / firm_price) ** (1 / (1 - l))
-            self.buy(('firm', firm), good='produce', quantity=demand, price=firm_price)
-            demand_list.append(demand)
-            print(firm_price)
-        self.log('total_demand', sum(demand_list))
-        print(demand_list)
-        return demand_list
+        demand_list = ces_demand(prices, I, self.l, q)
+        tracing.debug('prices %s', prices)
+        self.log('total_demand', demand_list.sum())
+        tracing.debug('demand %s', demand_list)
+        return self.name, demand_list, prices
+
+    def receive_goods(self, settlement, good):
+        """
+        receives the goods bought on the market and pays for them
+
+        Args:   settlement = the settlement of goods_market.clear_bids
+                good = the good that was traded
+        """
+        bought, spent = settlement['bought'].get(self.name, (0, 0))
+        self.create(good, bought)
+        self.destroy('money', min(spent, self['money']))
 
     def print_possessions(self):
         """
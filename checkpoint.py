@@ -0,0 +1,88 @@
+"""
+Checkpoint and resume of the full simulation state.
+
+A checkpoint is taken at the end of a day and holds every attribute the model set on the agents,
+their possessions, the messages that are still pending and the state of the random number
+generators. It is pickled into one gzip-compressed file.
+"""
+import gzip
+import pickle
+import random
+import numpy as np
+
+
+class Checkpointing:
+    """
+    Mixin for abce agents: get_state and set_state export and import everything the model keeps in
+    an agent. The attributes abce itself sets up and the ones a mixin lists in _not_checkpointed are
+    left out, they are rebuilt with the simulation.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._abce_attributes = set(self.__dict__) | {'_abce_attributes'}
+
+    def get_state(self):
+        skipped = self._abce_attributes.union(getattr(self, '_not_checkpointed', ()))
+        attributes = {key: value for key, value in self.__dict__.items() if key not in skipped}
+        messages = self.get_messages_all()
+        for topic, contents in messages.items():
+            for content in contents:
+                self.send(self.name, topic, content)
+        return self.name, {'attributes': attributes,
+                           'possessions': dict(self.possessions()),
+                           'messages': messages}
+
+    def set_state(self, states):
+        state = states[self.name]
+        self.__dict__.update(state['attributes'])
+        # every good is emptied and created anew, adding the difference to the starting balance would
+        # not give back the exact quantity in floating point
+        for good in dict(self.possessions()):
+            self.destroy(good)
+        for good, quantity in state['possessions'].items():
+            self.create(good, quantity)
+        for topic, contents in state['messages'].items():
+            for content in contents:
+                self.send(self.name, topic, content)
+
+
+def save(filename, day, time, params, groups):
+    """
+    writes a checkpoint
+
+    Args:   filename = the file the checkpoint is written to
+            day = the index of the day the simulation continues with
+            time = the abce time of the simulation
+            params = the parameters of the simulation
+            groups = all agent groups of the simulation
+    """
+    agents = {}
+    for group in groups:
+        agents.update(group.get_state())
+    state = {'day': day,
+             'time': time,
+             'params': params,
+             'random': random.getstate(),
+             'numpy_random': np.random.get_state(),
+             'agents': agents}
+    with gzip.open(filename, 'wb', compresslevel=6) as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load(filename):
+    with gzip.open(filename, 'rb') as f:
+        return pickle.load(f)
+
+
+def restore(filename, groups):
+    """
+    restores the agents and the random number generators of a freshly built simulation from a checkpoint
+
+    Returns: the checkpoint, its 'day' entry is the index of the day the simulation continues with
+    """
+    state = load(filename)
+    for group in groups:
+        group.set_state(state['agents'])
+    random.setstate(state['random'])
+    np.random.set_state(state['numpy_random'])
+    return state
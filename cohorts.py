@@ -0,0 +1,65 @@
+"""
+Household cohorts: the people are split into num_cohorts People agents with their own population,
+money, income and wage acceptance. abce spreads the cohorts across the worker processes, and every
+day the labour supply and the demand of the cohorts are reduced back to the firms and farms, see
+labour_market.clear_vacancies and goods_market.clear_bids.
+"""
+import numpy as np
+import rng
+
+
+def cohort_parameters(params):
+    """
+    returns the agent parameters of the cohorts, one dictionary per cohort
+
+    The population is split evenly. The money is split by lognormal weights with a standard deviation
+    of cohort_money_spread, and the cohorts own the firms in the same proportions. The wage acceptance
+    of every cohort is wage_acceptance scaled by a factor between exp(-cohort_acceptance_spread) and
+    exp(cohort_acceptance_spread).
+    """
+    n = params['num_cohorts']
+    generator = rng.group_stream(params['seed'], 'people')
+    wealth = generator.lognormal(0, params['cohort_money_spread'], n)
+    wealth /= wealth.sum()
+    acceptance = params['wage_acceptance'] * np.exp(generator.uniform(-1, 1, n) * params['cohort_acceptance_spread'])
+    return [{'cohort_population': params['population'] / n,
+             'cohort_money': params['people_money'] * share,
+             'cohort_wage_acceptance': wage_acceptance,
+             'dividend_share': share}
+            for share, wage_acceptance in zip(wealth, acceptance)]
+
+
+def household_income(allocation, wage_bills, dividends, households):
+    """
+    splits the wages and the dividends paid by the firms or farms among the cohorts
+
+    Args:   allocation = the allocation of labour_market.clear_vacancies
+            wage_bills = dictionary from employer name to the wages it paid, each cohort receives the share
+                         it has in the employer's workforce
+            dividends = the total dividends, split by the dividend_share of the cohorts
+            households = list of (name, population, wage_acceptance, dividend_share) of the cohorts
+
+    Returns: dictionary from cohort name to income
+    """
+    bills = np.array([wage_bills.get(name, 0) for name in allocation['employer_names']], dtype=float)
+    income = allocation['shares'] @ bills
+    income += dividends * np.array([share for _, _, _, share in households])
+    return dict(zip(allocation['cohort_names'], income))
+
+
+def gini(values):
+    """
+    returns the Gini coefficient of a vector of incomes or money holdings
+    """
+    values = np.sort(np.asarray(values, dtype=float))
+    n = len(values)
+    if n == 0 or values.sum() == 0:
+        return 0.0
+    return float((2 * np.arange(1, n + 1) - n - 1) @ values / (n * values.sum()))
+
+
+def inequality(panel, variables=('money', 'income')):
+    """
+    returns the Gini coefficient of the logged variables across the cohorts for every round of a people panel
+    """
+    return panel.groupby('round')[list(variables)].agg(gini)
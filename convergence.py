@@ -0,0 +1,94 @@
+"""
+Steady-state detection on the daily snapshots of main.simulate.
+
+A ConvergenceMonitor keeps the last days of a few aggregate variables and applies a windowed test
+every day. The economy is in a steady state when the test finds every variable changed by less than
+the tolerance. The 'seasonal' test compares the last window with the same window one season earlier,
+so the harvest cycle does not count as a change; the 'window' test compares the last two windows and
+is meant for runs without harvest. Tests are registered with @convergence_test and chosen with the
+convergence_test parameter.
+"""
+from collections import deque
+import numpy as np
+
+
+CONVERGENCE_TESTS = {}
+
+
+def convergence_test(name):
+    def register(test):
+        CONVERGENCE_TESTS[name] = test
+        return test
+    return register
+
+
+def _relative(change, reference):
+    return change / np.maximum(np.abs(reference), 1e-12)
+
+
+@convergence_test('window')
+def window_test(history, window, season):
+    """
+    relative change between the means of the last two windows
+
+    Returns: vector of the relative changes, None while the history is shorter than two windows
+    """
+    if len(history) < 2 * window:
+        return None
+    last = history[-window:].mean(axis=0)
+    previous = history[-2 * window:-window].mean(axis=0)
+    return _relative(np.abs(last - previous), previous)
+
+
+@convergence_test('seasonal')
+def seasonal_test(history, window, season):
+    """
+    mean relative difference between the last window and the same days one season earlier
+
+    Returns: vector of the relative changes, None while the history is shorter than a season and a window
+    """
+    if len(history) < season + window:
+        return None
+    last = history[-window:]
+    year_before = history[-season - window:-season]
+    return _relative(np.abs(last - year_before).mean(axis=0), np.abs(year_before).mean(axis=0))
+
+
+class ConvergenceMonitor:
+    """
+    Args:   variables = the snapshot entries that are tested
+            test = the name of the convergence test
+            window = the number of days of a window
+            tolerance = the largest relative change of a variable in a steady state
+            season = the length of the seasonal cycle in days
+    """
+    def __init__(self, variables, test='seasonal', window=90, tolerance=0.01, season=365):
+        self.variables = list(variables)
+        self.test = test
+        self.window = window
+        self.tolerance = tolerance
+        self.season = season
+        self.history = deque(maxlen=season + 2 * window)
+        self.converged = None
+
+    def update(self, snapshot):
+        """
+        adds the snapshot of a day
+
+        Returns: True on the day the steady state is detected
+        """
+        self.history.append([snapshot[variable] for variable in self.variables])
+        if self.converged is not None:
+            return False
+        changes = CONVERGENCE_TESTS[self.test](np.array(self.history, dtype=float), self.window, self.season)
+        if changes is None or not (changes < self.tolerance).all():
+            return False
+        self.converged = {'day': snapshot['day'],
+                          'date': str(snapshot.get('date', '')),
+                          'test': self.test,
+                          'window': self.window,
+                          'tolerance': self.tolerance,
+                          'changes': dict(zip(self.variables, changes.tolist())),
+                          'reason': '%s test: %s changed by less than %g over %i days'
+                                    % (self.test, ', '.join(self.variables), self.tolerance, self.window)}
+        return True
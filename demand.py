@@ -0,0 +1,38 @@
+import numpy as np
+
+
+def price_vector(price_dict, group, number):
+    """
+    turns the price dictionary of a consumer into a vector of prices ordered by seller id
+
+    Args:   price_dict = dictionary of prices keyed by (group, id)
+            group = the group of the sellers, e.g. 'firm' or 'farm'
+            number = the number of sellers in the group
+    """
+    return np.fromiter((price_dict[group, id] for id in range(number)), dtype=float, count=number)
+
+
+def price_index(prices, l):
+    """
+    returns the parameter q as defined in the C-D utility function for a vector of prices
+    """
+    prices = np.asarray(prices, dtype=float)
+    return float(np.sum(prices ** (l / (l - 1))) ** ((l - 1) / l))
+
+
+def ces_demand(prices, income, l, q=None):
+    """
+    Calculates the demand for the goods of every seller in one batched call
+
+    Args:   prices = vector of the prices of the sellers
+            income = the money spent by the consumer, or a vector of incomes for several consumers
+            l = parameter as defined in the C-D utility function
+            q = the price index, calculated from the prices when not given
+
+    Returns: a demand vector of the same length as prices, or a (consumers x sellers) matrix when income is a vector
+    """
+    prices = np.asarray(prices, dtype=float)
+    if q is None:
+        q = price_index(prices, l)
+    shares = (q / prices) ** (1 / (1 - l)) / q
+    return np.multiply.outer(income, shares)
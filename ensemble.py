@@ -0,0 +1,158 @@
+import multiprocessing
+import sys
+import numpy as np
+import pandas as pd
+from logsink import read_panel
+
+
+def daily_aggregates(path):
+    """
+    reads the panels of an abce run and returns the daily aggregates of prices, wages, money, sales
+    and the wage share
+    """
+    firms = read_panel(path, 'firm').groupby('round')
+    farms = read_panel(path, 'farm').groupby('round')
+    aggregates = pd.DataFrame({'price': firms['price'].mean(),
+                               'firm_wage': firms['firm_wage'].mean(),
+                               'firm_money': firms['money'].sum(),
+                               'firm_sales': firms['sales'].sum(),
+                               'wage_share': firms['wage_share'].mean(),
+                               'farm_wage': farms['wage_farm'].mean(),
+                               'farm_money': farms['money'].sum(),
+                               'farm_sales': farms['sales'].sum()})
+    return aggregates.reset_index(drop=True).rename_axis('round')
+
+
+def run_seed(args):
+    """
+    runs one simulation of the ensemble and returns its daily aggregates, the panels stay on disk
+    """
+    from main import main
+
+    params, seed = args
+    result = main(dict(params, seed=seed))
+    if params['engine'] == 'fast':
+        return result
+    return daily_aggregates(result)
+
+
+class P2Quantile:
+    """
+    Streaming estimate of the p-quantile with the P-square algorithm (Jain and Chlamtac, 1985).
+
+    The estimator keeps five markers per entry of an array of shape `shape`, so the quantile of every
+    day and every variable is updated in one vectorized step per run.
+    """
+    def __init__(self, p, shape):
+        self.p = p
+        self.count = 0
+        expand = (slice(None),) + (None,) * len(shape)
+        self.heights = np.zeros((5,) + shape)
+        self.positions = np.broadcast_to(np.arange(1.0, 6.0)[expand], (5,) + shape).copy()
+        self.desired = np.broadcast_to(np.array([1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5])[expand], (5,) + shape).copy()
+        self.increments = np.array([0, p / 2, p, (1 + p) / 2, 1])[expand]
+        self.markers = np.arange(5)[expand]
+
+    def add(self, x):
+        if self.count < 5:
+            self.heights[self.count] = x
+            self.count += 1
+            if self.count == 5:
+                self.heights.sort(axis=0)
+            return
+        self.count += 1
+        q, n = self.heights, self.positions
+        q[0] = np.minimum(q[0], x)
+        q[4] = np.maximum(q[4], x)
+        cell = (x >= q[1:4]).sum(axis=0)
+        n += self.markers > cell
+        self.desired += self.increments
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for i in (1, 2, 3):
+                d = self.desired[i] - n[i]
+                move = ((d >= 1) & (n[i + 1] - n[i] > 1)) | ((d <= -1) & (n[i - 1] - n[i] < -1))
+                s = np.sign(d)
+                parabolic = q[i] + s / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + s) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - s) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                neighbour = np.where(s > 0, q[i + 1], q[i - 1])
+                neighbour_position = np.where(s > 0, n[i + 1], n[i - 1])
+                linear = q[i] + s * (neighbour - q[i]) / (neighbour_position - n[i])
+                inside = (q[i - 1] < parabolic) & (parabolic < q[i + 1])
+                q[i] = np.where(move, np.where(inside, parabolic, linear), q[i])
+                n[i] = np.where(move, n[i] + s, n[i])
+
+    def value(self):
+        if self.count < 5:
+            return np.quantile(self.heights[:self.count], self.p, axis=0)
+        return self.heights[2].copy()
+
+
+class StreamingStats:
+    """
+    Combines the daily aggregates of the runs of an ensemble one run at a time.
+
+    Mean and variance are updated with Welford's algorithm and the quantiles with P2Quantile, so the
+    memory used does not grow with the number of runs.
+    """
+    def __init__(self, quantiles=(0.05, 0.5, 0.95)):
+        self.quantiles = quantiles
+        self.count = 0
+        self.index = self.columns = None
+        self.mean = self.m2 = None
+        self.estimators = {}
+
+    def add(self, aggregates):
+        """
+        adds the daily aggregates of one run, a DataFrame with one row per day
+        """
+        values = aggregates.to_numpy(dtype=float)
+        if self.count == 0:
+            self.index, self.columns = aggregates.index, aggregates.columns
+            self.mean = np.zeros(values.shape)
+            self.m2 = np.zeros(values.shape)
+            self.estimators = {p: P2Quantile(p, values.shape) for p in self.quantiles}
+        self.count += 1
+        delta = values - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (values - self.mean)
+        for estimator in self.estimators.values():
+            estimator.add(values)
+
+    def _frame(self, values):
+        return pd.DataFrame(values, index=self.index, columns=self.columns)
+
+    def result(self):
+        """
+        returns a dictionary of DataFrames: 'mean', 'var' and one entry per quantile, e.g. 'q0.5'
+        """
+        variance = self.m2 / (self.count - 1) if self.count > 1 else np.zeros_like(self.mean)
+        result = {'mean': self._frame(self.mean), 'var': self._frame(variance)}
+        for p, estimator in self.estimators.items():
+            result['q%g' % p] = self._frame(estimator.value())
+        return result
+
+
+def run_ensemble(params, seeds, processes=None, quantiles=(0.05, 0.5, 0.95)):
+    """
+    runs one simulation per seed across a process pool and combines the daily aggregates online
+
+    Args:   params = the parameters of the simulation, as in main.py
+            seeds = the random seeds, one run per seed
+            processes = the number of worker processes, defaults to the number of cores
+
+    Returns: a StreamingStats with the statistics of the ensemble
+    """
+    stats = StreamingStats(quantiles)
+    with multiprocessing.Pool(processes) as pool:
+        for aggregates in pool.imap(run_seed, [(params, seed) for seed in seeds]):
+            stats.add(aggregates)
+    return stats
+
+
+if __name__ == '__main__':
+    from main import params
+    num_seeds = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    result = run_ensemble(params, range(num_seeds)).result()
+    print(result['mean'].describe())
@@ -1,26 +1,39 @@
 import abce
-import random
+from logsink import SinkLogging
+from checkpoint import Checkpointing
+from agent_state import SharedParameters
+from ledger import LedgerAccount
+import rng
+import price_board
+import tracing
+import farm_cycle
 
 
-class Farm(abce.Agent):
+class Farm(Checkpointing, SharedParameters, LedgerAccount, SinkLogging, abce.Agent):
     def init(self, farm_money, farm_land, harvest_per_day, goods_per_land, goods_per_worker,
-             goods_price, days_harvest, farm_wage_increment, farm_price_increment, num_farms, **_):
+             goods_price, days_harvest, farm_wage_increment, farm_price_increment, num_farms, seed, board,
+             run_id, trace, **_):
+        tracing.set_level(trace)
         self.create("money", farm_money)
-        self.original_money = farm_money
-        self.land = farm_land
-        self.harvest_per_day = harvest_per_day
-        self.goods_per_land = goods_per_land
-        self.goods_per_worker = goods_per_worker
+        self.rng = rng.agent_stream(seed, self.group, self.id)
+        price_board.attach(board)
+        self.share(run_id,
+                   original_money=farm_money,
+                   land=farm_land,
+                   harvest_per_day=harvest_per_day,
+                   goods_per_land=goods_per_land,
+                   goods_per_worker=goods_per_worker,
+                   days_harvest=days_harvest,
+                   wage_increment=farm_wage_increment,
+                   price_increment=farm_price_increment)
         self.goods_price = goods_price
         self.days_left = days_harvest
-        self.days_harvest = days_harvest
-        self.wage_increment = farm_wage_increment
-        self.price_increment = farm_price_increment
         self.wage = 10
         self.farmable_land = 0
         self.goods_to_sell = 0
         self.ideal_workers= 10
         self.sales = 0
+        self.max_employees = 0
 
     def grow_crops(self):
         """
@@ -33,14 +46,18 @@ class Farm(abce.Agent):
     def harvest(self):
         """
         Converts farmable land into crops during the harvest period
+
+        Returns: (name, farm goods harvested)
         """
         max_goods = self.land * self.farmable_land * self.goods_per_land
         if self.harvest_per_day < max_goods:
-            self.create("farm_goods", self.harvest_per_day)
+            harvested = self.harvest_per_day
             self.farmable_land = (max_goods - self.harvest_per_day) / (self.land * self.goods_per_land)
         else:
-            self.create("farm_goods", max_goods)
+            harvested = max_goods
             self.farmable_land = 0
+        self.create("farm_goods", harvested)
+        return self.name, harvested
 
     def find_ideal_workers(self):
         """
@@ -62,14 +79,13 @@ class Farm(abce.Agent):
         If they don't hire as many workers as they'd like they offer a higher wage. If their vacancies are oversubscribed
         they lower the offered wage.
         """
-        messages = self.get_messages("max_employees")
+        change = self.rng.uniform(0, self.wage_increment * self.wage)
         if self.ideal_workers > self['workers']:
-            self.wage += random.uniform(0, self.wage_increment * self.wage)
+            self.wage += change
 
         elif self.ideal_workers <= self['workers']:
-            max_employees = messages[0]
-            if max_employees > self.ideal_workers:
-                self.wage -= random.uniform(0, self.wage_increment * self.wage)
+            if self.max_employees > self.ideal_workers:
+                self.wage -= change
                 if self.wage < 0:
                     self.wage = 0
         else:
@@ -78,29 +94,28 @@ class Farm(abce.Agent):
     def transport_goods(self): # don't include this just pay workers flat price for 1 day work
         """
         Transports goods to the market. The workers are payed here
+
+        Returns: (name, wages paid), the wages are split among the people cohorts by cohorts.household_income
         """
         self.goods_to_sell = self["workers"] * self.goods_per_worker
         if self.goods_to_sell > self.not_reserved("farm_goods"):
             self.goods_to_sell = self.not_reserved("farm_goods")
-        self.give("people", good='money', quantity=(self['workers'] * self.wage))
+        wages = self['workers'] * self.wage
+        self.destroy("money", wages)
         self.destroy("workers")
+        return self.name, wages
 
-    def sell_harvest(self):
+    def publish_supply(self):
+        return {"name": self.name, "id": self.id, "price": self.goods_price, "quantity": self.goods_to_sell}
+
+    def sell_harvest(self, settlement):
         """
-        Sells the goods
+        Sells the goods, the market is cleared by goods_market.clear_bids
         """
-        for offer in self.get_offers("farm_goods"):
-            if offer.price >= self.goods_price and self.goods_to_sell >= offer.quantity:
-                self.accept(offer)
-                self.sales = offer.quantity
-                self.goods_to_sell -= offer.quantity
-            elif offer.price >= self.goods_price and self.goods_to_sell < offer.quantity:
-                self.sales = self.goods_to_sell
-                self.accept(offer, quantity=self.goods_to_sell)
-                self.goods_to_sell = 0
-            elif offer.price < self.goods_price:
-                self.reject(offer)
-                self.sales = 0
+        self.sales, revenue = settlement['sold'][self.name]
+        self.destroy("farm_goods", self.sales)
+        self.create("money", revenue)
+        self.goods_to_sell -= self.sales
 
     def log_sales(self):
         """
@@ -113,40 +128,58 @@ class Farm(abce.Agent):
         """
         Adjusts prices based on how many goods are sold
         """
+        change = self.rng.uniform(0, self.price_increment * self.goods_price)
         if self.goods_to_sell > 0 and self.wage < self.goods_per_worker * self.goods_price:
-            self.goods_price -= random.uniform(0, self.price_increment * self.goods_price)
+            self.goods_price -= change
         else:
-            self.goods_price += random.uniform(0, self.price_increment * self.goods_price)
+            self.goods_price += change
 
     def publish_vacancies(self):
         """
         Adds the number of vacancies available per farm to a list that the people then use to send workers to the farm
         """
         if self.not_reserved("money") > 2 * self.ideal_workers * self.wage:
-            print("name:", self.name, "number", self.ideal_workers, "wage", self.wage)
-            return {"name": self.name, "number": self.ideal_workers, "wage": self.wage}
+            number = self.ideal_workers
         else:
-            print("name", self.name, "number", (self.not_reserved("money") / (2 * self.wage)), "wage", self.wage)
-            return{"name": self.name, "number": (self.not_reserved("money") / (2 * self.wage)), "wage": self.wage}
+            number = self.not_reserved("money") / (2 * self.wage)
+        tracing.debug('name: %s number %s wage %s', self.name, number, self.wage)
+        return {"name": self.name, "number": number, "wage": self.wage}
 
 
+    def hire(self, allocation):
+        """
+        receives the workers allocated by the labour market and the number of workers that were willing to work
+        """
+        hired, self.max_employees = allocation['employers'][self.name]
+        self.create('workers', hired)
+
     def send_prices(self):
         """
-        Sends a message containing the price of the farm goods to the people
+        Posts the price of the farm goods on the price board, the people read it there
         """
-        self.send_envelope('people', 'price', self.goods_price)
+        price_board.post('farm', self.id, self.goods_price)
         return self.goods_price
 
+    def snapshot(self):
+        return self.goods_price, self.wage, self["money"], self["farm_goods"]
+
+    def logged_possessions(self, money):
+        """
+        returns the variables print_possessions logs, with the given money
+        """
+        return {"money": money,
+                "workers": self["workers"],
+                'wage_farm': self.wage,
+                'ideal_workers_farms': self.ideal_workers,
+                'farm_goods': self['farm_goods']}
+
     def print_possessions(self):
         """
         prints possessions and logs money of a person agent
         """
         #print('    ' + self.group + str(dict(self.possessions())))
-        self.log("money", self["money"])
-        self.log("workers", self["workers"])
-        self.log('wage_farm', self.wage)
-        self.log('ideal_workers_farms', self.ideal_workers)
-        self.log('farm_goods', self['farm_goods'])
+        for variable, value in self.logged_possessions(self["money"]).items():
+            self.log(variable, value)
 
     def print_possessions2(self):
         """
@@ -160,10 +193,47 @@ class Farm(abce.Agent):
     def end_harvest(self):
         """
         At the end of harvest, farms mst destroy their produce
+
+        Returns: (name, farm goods destroyed)
         """
+        destroyed = 0
         if self.days_left == 1:
-            self.destroy("farm_goods")
+            destroyed = self["farm_goods"]
+            self.destroy("farm_goods", destroyed)
+        return self.name, destroyed
 
     def redistribute_profits(self, days):
+        """
+        pays a part of the money above the original money to the farmers, main settles the payments of
+        all farms with the farmers at once
+
+        Returns: (name, money paid)
+        """
+        profits = 0
         if self["money"] > self.original_money:
-            self.give("farmers", good='money', quantity=((self['money'] - self.original_money) / days))
\ No newline at end of file
+            profits = (self['money'] - self.original_money) / days
+            self.destroy('money', profits)
+        return self.name, profits
+
+    def fast_forward(self, days, divisor, times):
+        """
+        applies a stretch of idle days at once: grow_crops, redistribute_profits with the divisors divisor,
+        divisor - 1, ... and the logs of log_sales and print_possessions of every day (see farm_cycle.py)
+
+        Args:   days = the number of days of the stretch
+                divisor = the divisor of redistribute_profits on the first day
+                times = the abce times of the days, the logs are written for them
+
+        Returns: (name, money paid to the farmers on every day of the stretch, snapshot at the start),
+                 the farm pays all of it now
+        """
+        snapshot = self.snapshot()
+        self.farmable_land = farm_cycle.grow(self.farmable_land, days)
+        transfer = farm_cycle.daily_transfer(self['money'] - self.original_money, divisor)
+        for day, time in enumerate(times):
+            self.log_at(time, 'sales', self.sales)
+            self.sales = 0
+            for variable, value in self.logged_possessions(snapshot[2] - transfer * (day + 1)).items():
+                self.log_at(time, variable, value)
+        self.destroy('money', transfer * days)
+        return self.name, transfer, snapshot
@@ -0,0 +1,58 @@
+"""
+Closed-form fast-forward of the farms outside harvest.
+
+Outside harvest a farm only grows crops (farmable_land rises by 0.01 a day up to 1), pays the money
+above its original money to the farmers with a divisor that falls by one every day and logs. With an
+excess e and a first divisor D the farm pays e / D on the first day and keeps e (D - 1) / D, so on
+every later day it pays (e (D - t) / D) / (D - t) = e / D again: the transfer is constant. A stretch of
+such idle days is therefore one call per farm: the farm grows its crops, logs every day of the
+stretch and pays the transfers of all days at once. main hands the farmers the constant daily
+transfer on every day of the stretch and takes the farm rows of the daily snapshots from a Stretch,
+so the farms are not called again until the stretch ends.
+"""
+import numpy as np
+
+
+GROWTH_PER_DAY = 0.01
+
+
+def grow(farmable_land, days):
+    """
+    returns farmable_land after `days` days of Farm.grow_crops
+    """
+    return min(1, farmable_land + GROWTH_PER_DAY * days)
+
+
+def daily_transfer(excess, divisor):
+    """
+    returns the money a farm pays every day of an idle stretch that starts with the given divisor
+
+    Args:   excess = money of the farm above its original money at the start of the stretch
+            divisor = the divisor of Farm.redistribute_profits on the first day of the stretch
+    """
+    if excess <= 0:
+        return 0
+    return excess / divisor
+
+
+class Stretch:
+    """
+    The farms of a fast-forwarded stretch, from the results of Farm.fast_forward.
+
+    Args:   day = the first day of the stretch
+            results = list of (name, daily transfer, snapshot at the start of the stretch) of the farms
+    """
+    def __init__(self, day, results):
+        self.day = day
+        self.names = [name for name, _, _ in results]
+        self.transfers = np.array([transfer for _, transfer, _ in results], dtype=float)
+        self.start = np.array([snapshot for _, _, snapshot in results], dtype=float).reshape(len(results), 4)
+
+    def snapshot(self, day):
+        """
+        returns the rows of Farm.snapshot at the end of a day of the stretch, the money is computed
+        from the transfers paid so far
+        """
+        rows = self.start.copy()
+        rows[:, 2] -= self.transfers * (day - self.day + 1)
+        return rows
@@ -1,62 +1,68 @@
 import abce
-import numpy as np
-class Farmers(abce.Agent):
+from logsink import SinkLogging
+from checkpoint import Checkpointing
+from agent_state import SharedParameters
+from ledger import LedgerAccount
+import tracing
+from demand import price_index, ces_demand
+import price_board
+class Farmers(Checkpointing, SharedParameters, LedgerAccount, SinkLogging, abce.Agent):
 
-    def init(self, farmers_money, farmers_population, l, num_firms, **_):
+    def init(self, farmers_money, farmers_population, l, num_firms, board, run_id, trace, **_):
+        tracing.set_level(trace)
         self.name = "farmers"
         self.create("money", farmers_money)
         self.population = farmers_population
-        self.l = l
-        self.num_firms = num_firms
-        self.price_dict = {}
-
-    def get_prices(self):
-        """
-        reads the messages from the firms and creates a price list
-        """
-        price_msg = self.get_messages("price")
-        for msg in price_msg:
-            self.price_dict[msg.sender] = msg.content
-        return self.price_dict
+        self.share(run_id, l=l, num_firms=num_firms)
+        price_board.attach(board)
 
     def find_q(self):
         """
         returns the parameter q as defined in the C-D utility function
         """
-        L = self.l
-        q = 0
-        for id in range(self.num_firms):
-            q += self.price_dict[('firm', id)] ** (L / (L - 1))
-        q = float(q) ** ((L - 1) / L)
-        return q
+        return price_board.cached('firm', ('q', self.l), lambda prices: price_index(prices, self.l))
 
     def buy_goods(self):
         """
-        Calculates the demand from each firm and makes buy offers for produce of this amount at this value, or as much
-        as the people can afford
+        Calculates the demand from each firm and bids for produce of this amount at this value, the bids are
+        cleared by goods_market.clear_bids
 
         Args:   q, l parameters as defined in the C-D utility function
                 firm_price = the price the firm is selling the goods for
                 firm_id = the number of the firm the people are trading with
+
+        Returns: (name, demand vector, price vector), the vectors are ordered by firm id
         """
+        prices = price_board.prices('firm')
         q = self.find_q()
-        print("q", q)
+        tracing.debug('q %s', q)
         self.log('q', q)
 
-        demand_list = []
-        l = self.l
-        print("monsey", self["money"], self.not_reserved("money"))
         I = self.not_reserved('money')
-        assert np.isfinite(I)
-        for firm in range(self.num_firms):  # fix systematic advantage for 0 firm
-            firm_price = float(self.price_dict['firm', firm])
-            demand = (I / q) * (q / firm_price) ** (1 / (1 - l))
-            self.buy(('firm', firm), good='produce', quantity=demand, price=firm_price)
-            demand_list.append(demand)
-            print(firm_price)
-        self.log('total_demand', sum(demand_list))
-        print(demand_list)
-        return demand_list
+        if tracing.debugging:
+            tracing.debug('money %s not reserved %s', self["money"], I)
+        demand_list = ces_demand(prices, I, self.l, q)
+        tracing.debug('prices %s', prices)
+        self.log('total_demand', demand_list.sum())
+        tracing.debug('demand %s', demand_list)
+        return self.name, demand_list, prices
+
+    def receive_goods(self, settlement, good):
+        """
+        receives the goods bought on the market and pays for them
+
+        Args:   settlement = the settlement of goods_market.clear_bids
+                good = the good that was traded
+        """
+        bought, spent = settlement['bought'].get(self.name, (0, 0))
+        self.create(good, bought)
+        self.destroy('money', min(spent, self['money']))
+
+    def receive_farm_profits(self, quantity):
+        """
+        receives the profits of the farms, see Farm.redistribute_profits
+        """
+        self.create('money', quantity)
 
     def log_money(self):
         """
@@ -65,8 +71,15 @@ class Farmers(abce.Agent):
         self.log("money", self["money"])
 
     def consumption(self):
-        self.log("consumption", self["produce"])
-        self.destroy("produce")
+        """
+        consumes all produce
+
+        Returns: (name, produce consumed)
+        """
+        consumed = self["produce"]
+        self.log("consumption", consumed)
+        self.destroy("produce", consumed)
+        return self.name, consumed
 
-    def dassert(self):
-        assert abs(self.not_reserved("money") - self["money"]) < 0.001, (self.not_reserved("money"), self["money"])
\ No newline at end of file
+    def snapshot(self):
+        return self["money"]
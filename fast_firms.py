@@ -0,0 +1,240 @@
+import numpy as np
+import pandas as pd
+from demand import ces_demand
+import labour_market
+import goods_market
+import rng
+import agent_state
+import cohorts
+
+
+NO_ACTION, FEWER_WORKERS, LOWER_PRICE, MORE_WORKERS, HIGHER_PRICE = range(5)
+
+
+class FirmPopulation:
+    """
+    The whole population of firms stored as arrays, one entry per firm.
+
+    Every daily rule of Firm is implemented as one vectorized step over all firms, so that the
+    engine scales to many more firms than the abce agents. The state and the rules are the same as
+    in firm.py:
+    - last_action is encoded as an integer, see NO_ACTION, FEWER_WORKERS, ...
+    - random numbers are drawn for all firms at once from the group stream of rng.py
+    """
+    def __init__(self, number, firm_money, wage_increment, price_increment, worker_increment,
+                 phi_upper, phi_lower, excess, num_days_buffer, productivity, num_firms, population,
+                 seed=None, **_):
+        self.number = number
+        self.wage_increment = wage_increment
+        self.price_increment = price_increment
+        self.phi_upper = phi_upper
+        self.phi_lower = phi_lower
+        self.excess = excess
+        self.num_days_buffer = num_days_buffer
+        self.productivity = productivity
+        self.worker_increment = worker_increment
+        self.rng = rng.group_stream(seed, 'firm')
+
+        self.money = np.full(number, float(firm_money))
+        self.last_round_money = self.money.copy()
+        self.produce = np.zeros(number)
+        self.workers = np.zeros(number)
+        self.max_employees = np.zeros(number)
+        self.ideal_num_workers = np.full(number, population / num_firms * 0.5)
+        self.price = np.full(number, 20.0)
+        self.wage = np.full(number, 10.0)
+        self.upper_inv = np.zeros(number)
+        self.lower_inv = np.zeros(number)
+        self.profit = np.zeros(number)
+        self.profit_1 = np.zeros(number)
+        self.salary = np.zeros(number)
+        self.dividends = np.zeros(number)
+        self.sales = np.zeros(number)
+        self.last_action = np.full(number, NO_ACTION, dtype=np.int8)
+
+    def publish_vacancies(self):
+        return self.ideal_num_workers, self.wage
+
+    def hire(self, workers, max_employees):
+        """
+        receives the workers sent by the people and the number of workers that were willing to work
+        """
+        self.workers = workers
+        self.max_employees = max_employees
+
+    def production(self):
+        """
+        produces goods to add to inventory based on number of workers and productivity
+        """
+        produced = self.productivity * self.workers
+        self.produce += produced
+        return produced
+
+    def pay_workers(self):
+        """
+        pays the workers, firms that can not afford the salary give out all money and reduce their wage
+
+        Returns: the total salary paid to the people
+        """
+        salary = self.wage * self.workers
+        short = salary > self.money
+        salary = np.where(short, self.money, salary)
+        self.wage = np.where(short, np.maximum(0, self.wage - self.wage_increment), self.wage)
+        self.money -= salary
+        self.salary = salary
+        return salary.sum()
+
+    def pay_dividents(self):
+        """
+        pays out the money above the buffer of num_days_buffer days of wages
+
+        Returns: the total dividends paid to the people
+        """
+        buffer = self.num_days_buffer * self.wage * self.ideal_num_workers
+        self.dividends = self.money - buffer
+        paid = np.maximum(0, self.dividends)
+        self.money -= paid
+        return paid.sum()
+
+    def sell_goods(self, quantities, prices):
+        """
+        sells the goods to the consumers, offers are served in the order of the rows
+
+        Args:
+            quantities: (consumers x firms) matrix of the quantities demanded
+            prices: (consumers x firms) matrix of the prices offered
+
+        Returns: (consumers x firms) matrix of the quantities sold
+        """
+        sold = goods_market.clear(quantities, prices, self.price, self.produce)
+        self.sales = sold.sum(axis=0)
+        self.produce -= self.sales
+        self.money += (sold * prices).sum(axis=0)
+        return sold
+
+    def determine_bounds(self, demand):
+        """
+        determines the bound on the inventory amounts from the demand of the people
+        """
+        self.upper_inv = self.phi_upper * demand
+        self.lower_inv = self.phi_lower * demand
+
+    def determine_wage(self):
+        """
+        raises the wage where the ideal number of workers wasn't satisfied and lowers it where the
+        number of workers offered exceeded excess times the ideal number
+        """
+        change = rng.daily_draws(self.rng, self.number, 1)[0] * self.wage_increment * self.wage
+        raise_wage = self.ideal_num_workers > self.workers
+        lower_wage = ((self.ideal_num_workers == self.workers)
+                      & (self.max_employees > self.excess * self.ideal_num_workers))
+        self.wage = np.where(raise_wage, self.wage + change, self.wage)
+        self.wage = np.where(lower_wage, np.maximum(0, self.wage - change), self.wage)
+
+    def determine_profits(self):
+        self.profit_1 = self.profit
+        self.profit = self.money - self.last_round_money + self.dividends
+        self.last_round_money = self.money.copy()
+
+    def expand_or_change_price(self):
+        profitable = self.profit >= self.profit_1
+        too_much = self.produce > self.upper_inv
+        too_little = ~too_much & (self.produce < self.lower_inv)
+        redraw, coin, change = rng.daily_draws(self.rng, self.number, 3)
+        redraw = ~profitable | (redraw < 0.1)
+        coin = coin < 0.5
+
+        going_down = (self.last_action == FEWER_WORKERS) | (self.last_action == LOWER_PRICE)
+        going_up = (self.last_action == MORE_WORKERS) | (self.last_action == HIGHER_PRICE)
+        new_down = too_much & (redraw | ~going_down)
+        new_up = too_little & (redraw | ~going_up)
+        self.last_action = np.where(new_down, np.where(coin, FEWER_WORKERS, LOWER_PRICE), self.last_action)
+        self.last_action = np.where(new_up, np.where(coin, MORE_WORKERS, HIGHER_PRICE), self.last_action)
+        self.last_action = np.where(too_much | too_little, self.last_action, NO_ACTION).astype(np.int8)
+
+        fewer_workers = self.last_action == FEWER_WORKERS
+        more_workers = (self.last_action == MORE_WORKERS) & (self.workers >= self.ideal_num_workers)
+        worker_change = change * self.worker_increment * self.ideal_num_workers
+        self.ideal_num_workers = (self.ideal_num_workers - np.where(fewer_workers, worker_change, 0)
+                                  + np.where(more_workers, worker_change, 0))
+
+        price_change = change * self.price_increment * self.price
+        self.price = (self.price - np.where(self.last_action == LOWER_PRICE, price_change, 0)
+                      + np.where(self.last_action == HIGHER_PRICE, price_change, 0))
+
+        self.price = np.maximum(self.wage, self.price)
+        self.ideal_num_workers = np.maximum(0, self.ideal_num_workers)
+
+    def destroy_unused_labor(self):
+        """
+        destroys the labour and returns the wage share of every firm
+        """
+        self.workers = np.zeros(self.number)
+        return self.salary / (self.salary + self.dividends)
+
+
+def simulate(params, seed=None):
+    """
+    runs the firm sector of the economy with the firms as a FirmPopulation and yields the aggregates
+    of every day as it advances
+
+    The people and the farmers are aggregate consumers as in people.py and farmers_class.py. Farms
+    are not part of the fast engine, the equivalent abce run is one without harvest
+    (days_harvest=0).
+
+    Returns: a generator of dictionaries with the daily aggregates of the firm sector
+    """
+    firms = FirmPopulation(params['num_firms'], **dict(params, seed=seed))
+    people_money = float(params['people_money'])
+    farmers_money = float(params['farmers_money'])
+    population = params['population']
+
+    for day in range(params['num_days']):
+        number, wages = firms.publish_vacancies()
+        firms.hire(*labour_market.clear(number, wages, population, params['wage_acceptance'], params['matching_rule']))
+
+        produced = firms.production()
+        people_money += firms.pay_workers()
+        people_money += firms.pay_dividents()
+
+        demand = ces_demand(firms.price, np.array([people_money, farmers_money]), params['l'])
+        sold = firms.sell_goods(demand, np.broadcast_to(firms.price, demand.shape))
+        people_money, farmers_money = np.array([people_money, farmers_money]) - sold @ firms.price
+
+        firms.determine_bounds(demand[0])
+        firms.determine_wage()
+        firms.expand_or_change_price()
+        workers = firms.workers.sum()
+        wage_share = firms.destroy_unused_labor()
+        firms.determine_profits()
+
+        yield {'round': day,
+               'price': firms.price.mean(),
+               'firm_wage': firms.wage.mean(),
+               'workers': workers,
+               'ideal_num_workers': firms.ideal_num_workers.sum(),
+               'firm_money_gini': cohorts.gini(firms.money),
+               'production': produced.sum(),
+               'sales': firms.sales.sum(),
+               'wage_share': np.nanmean(wage_share),
+               'firm_money': firms.money.sum(),
+               'people_money': people_money,
+               'farmers_money': farmers_money}
+
+
+def memory_report(params):
+    """
+    returns the memory report of the firm population of a run, the size of its arrays only depends on
+    the number of firms (see agent_state.array_memory_report)
+    """
+    return agent_state.array_memory_report(FirmPopulation(params['num_firms'], **params))
+
+
+def run(params, seed=None):
+    """
+    runs the firm sector of the economy with the firms as a FirmPopulation, see simulate
+
+    Returns: a DataFrame with the daily aggregates of the firm sector
+    """
+    return pd.DataFrame(list(simulate(params, seed))).set_index('round')
+
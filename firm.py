@@ -1,8 +1,13 @@
 import abce
-import random
+from logsink import SinkLogging
+from checkpoint import Checkpointing
+from agent_state import SharedParameters
+from ledger import LedgerAccount
+import rng
+import price_board
 
 
-class Firm(abce.Agent):
+class Firm(Checkpointing, SharedParameters, LedgerAccount, SinkLogging, abce.Agent):
     """
     Firm:
     - employs workers each round
@@ -21,20 +26,24 @@ class Firm(abce.Agent):
     - pay left over profits to workers
     """
     def init(self, firm_money, wage_increment, price_increment, worker_increment,
-             phi_upper, phi_lower, excess, num_days_buffer, productivity, num_firms, population,  **_):
+             phi_upper, phi_lower, excess, num_days_buffer, productivity, num_firms, population, seed, board,
+             run_id, **_):
         """
         initializes starting characteristics
         """
         self.create("money", firm_money)
+        self.rng = rng.agent_stream(seed, self.group, self.id)
+        price_board.attach(board)
         self.last_round_money = firm_money
-        self.wage_increment = wage_increment
-        self.price_increment = price_increment
-        self.phi_upper = phi_upper
-        self.phi_lower = phi_lower
-        self.excess = excess
-        self.num_days_buffer = num_days_buffer
-        self.productivity = productivity
-        self.worker_increment = worker_increment
+        self.share(run_id,
+                   wage_increment=wage_increment,
+                   price_increment=price_increment,
+                   phi_upper=phi_upper,
+                   phi_lower=phi_lower,
+                   excess=excess,
+                   num_days_buffer=num_days_buffer,
+                   productivity=productivity,
+                   worker_increment=worker_increment)
         self.ideal_num_workers = population / num_firms * 0.5
         self.price = 20
         self.wage = 10
@@ -44,14 +53,18 @@ class Firm(abce.Agent):
         self.lower_price = 0
         self.profit = self.profit_1 = 0
         self.last_action = (None, None)
+        self.max_employees = 0
 
     def production(self):
         """
         produces goods to add to inventory based on number of workers and productivity
+
+        Returns: (name, goods produced)
         """
-        before = self["produce"]
-        self.create("produce", self.productivity * self["workers"])
-        self.log("production", self["produce"] - before)
+        produced = self.productivity * self["workers"]
+        self.create("produce", produced)
+        self.log("production", produced)
+        return self.name, produced
 
     def determine_wage(self):
         """
@@ -59,14 +72,13 @@ class Firm(abce.Agent):
         if the ideal number of workers wasn't satisfied then raises the wage
         if the number of workers offered exceeded 110% of the ideal number then lower the wage
         """
-        messages = self.get_messages("max_employees")
+        change = self.rng.uniform(0, self.wage_increment * self.wage)
         if self.ideal_num_workers > self['workers']:
-            self.wage += random.uniform(0, self.wage_increment * self.wage)
+            self.wage += change
 
         elif self.ideal_num_workers == self['workers']:
-            max_employees = messages[0]
-            if max_employees > self.excess * self.ideal_num_workers:
-                self.wage -= random.uniform(0, self.wage_increment * self.wage)
+            if self.max_employees > self.excess * self.ideal_num_workers:
+                self.wage -= change
                 if self.wage < 0:
                     self.wage = 0
         else:
@@ -92,27 +104,26 @@ class Firm(abce.Agent):
 
     def expand_or_change_price(self):
         profitable = self.profit >= self.profit_1
+        redraw, coin, change = self.rng.random(3)
 
         if self['produce'] > self.upper_inv:
-            if not profitable or random.random() < 0.1  or self.last_action[1] != '-':
-                self.last_action = random.choice([('ideal_num_workers', '-'),
-                                                  ('price', '-')])
+            if not profitable or redraw < 0.1  or self.last_action[1] != '-':
+                self.last_action = ('ideal_num_workers', '-') if coin < 0.5 else ('price', '-')
             if self.last_action != ('price', '-'):
-                self.ideal_num_workers -= random.uniform(0, self.worker_increment * self.ideal_num_workers)
+                self.ideal_num_workers -= change * self.worker_increment * self.ideal_num_workers
             elif self.last_action != ('ideal_num_workers', '-'):
-                self.price -= random.uniform(0, self.price_increment * self.price)
+                self.price -= change * self.price_increment * self.price
             else:
                 raise Exception()
 
         elif self['produce'] < self.lower_inv:
-            if not profitable or random.random() < 0.1 or self.last_action[1] != '+':
-                self.last_action = random.choice([('ideal_num_workers', '+'),
-                                                  ('price', '+')])
+            if not profitable or redraw < 0.1 or self.last_action[1] != '+':
+                self.last_action = ('ideal_num_workers', '+') if coin < 0.5 else ('price', '+')
             if self.last_action != ('price', '+'):
                 if self['workers'] >= self.ideal_num_workers:
-                    self.ideal_num_workers += random.uniform(0, self.worker_increment * self.ideal_num_workers)
+                    self.ideal_num_workers += change * self.worker_increment * self.ideal_num_workers
             elif self.last_action != ('ideal_num_workers', '+'):
-                self.price += random.uniform(0, self.price_increment * self.price)
+                self.price += change * self.price_increment * self.price
             else:
                 raise Exception()
         else:
@@ -122,48 +133,49 @@ class Firm(abce.Agent):
         self.ideal_num_workers = max(0, self.ideal_num_workers)
         self.log('price', self.price)
 
-    def sell_goods(self):
+    def publish_supply(self):
+        return {"name": self.name, "id": self.id, "price": self.price, "quantity": self["produce"]}
+
+    def sell_goods(self, settlement):
         """
-        sells the goods to the employees
+        sells the goods to the consumers, the market is cleared by goods_market.clear_bids
         """
-        for offer in self.get_offers("produce"):
-            if offer.price >= self.price and self["produce"] >= offer.quantity:
-                self.accept(offer)
-                self.log('sales', offer.quantity)
-            elif offer.price >= self.price and self["produce"] < offer.quantity:
-                self.log('sales', self["produce"])
-                self.accept(offer, quantity=self["produce"])
-            elif offer.price < self.price:
-                self.reject(offer)
-                self.log('sales', 0)
-            else:
-                raise Exception()
+        sold, revenue = settlement['sold'][self.name]
+        self.destroy("produce", sold)
+        self.create("money", revenue)
+        self.log('sales', sold)
 
     def pay_workers(self):
         """
         pays the workers
         if the salary owed is greater than owned money:
         gives out all money and reduces wage by 1 unit
+
+        Returns: (name, salary), the salaries are split among the people cohorts by cohorts.household_income
         """
         salary = self.wage * self['workers']
         if salary > self["money"]:
             salary = self["money"]
             self.wage -= self.wage_increment
             self.wage = max(0, self.wage)
-        self.give("people", "money", quantity=salary)
+        self.destroy("money", salary)
         self.salary = salary
+        return self.name, salary
 
     def pay_dividents(self):
         """
         pays workers/bosses (same agent) the extra profits
+
+        Returns: (name, dividends paid), they are split among the people cohorts by cohorts.household_income
         """
         buffer = self.num_days_buffer * self.wage * self.ideal_num_workers
         dividends = self["money"] - buffer
         if dividends > 0:
-            self.give("people", "money", quantity=dividends)
+            self.destroy("money", dividends)
 
         self.log('dividends', max(0, dividends))
         self.dividends = dividends
+        return self.name, max(0, dividends)
 
     def getvalue_ideal_num_workers(self):
         return (self.name, self.ideal_num_workers)
@@ -174,11 +186,26 @@ class Firm(abce.Agent):
     def publish_vacancies(self):
         return {"name": self.name, "number": self.ideal_num_workers, "wage": self.wage}
 
+    def hire(self, allocation):
+        """
+        receives the workers allocated by the labour market and the number of workers that were willing to work
+
+        Args:
+            allocation: the allocation of labour_market.clear_vacancies
+        """
+        hired, self.max_employees = allocation['employers'][self.name]
+        self.create('workers', hired)
+
     def send_prices(self):
-        self.send_envelope('people', 'price', self.price)
-        self.send_envelope('farmers', 'price', self.price)
+        """
+        posts the price on the price board, the people and the farmers read it there
+        """
+        price_board.post('firm', self.id, self.price)
         return self.price
 
+    def snapshot(self):
+        return self.price, self.wage, self["money"], self["produce"], self.ideal_num_workers
+
     def print_possessions(self):
         """
         prints possessions and logs money of a person agent
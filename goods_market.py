@@ -0,0 +1,73 @@
+"""
+Goods market clearing for all buyers and sellers of a good in one batched operation.
+
+The bids of all buyers are collected into (buyers x sellers) arrays and matched against the ask prices
+and the inventories of the sellers with the same rules the agents used for single offers: a bid is
+accepted when its price is at least the ask, and the bids of a seller are served in order until its
+inventory is exhausted, the last one partially. Money and goods are then settled in bulk, one
+transfer per agent.
+"""
+import numpy as np
+
+
+def clear(quantities, bid_prices, ask_prices, inventories):
+    """
+    matches the bids against the sellers
+
+    Args:   quantities = (buyers x sellers) matrix of the quantities bid for
+            bid_prices = (buyers x sellers) matrix of the prices bid
+            ask_prices = vector of the prices of the sellers
+            inventories = vector of the quantities the sellers can sell
+
+    Returns: (buyers x sellers) matrix of the quantities sold
+    """
+    quantities = np.where(bid_prices >= ask_prices, quantities, 0)
+    served = np.minimum(np.cumsum(quantities, axis=0), inventories)
+    return np.diff(served, axis=0, prepend=0)
+
+
+def sold_total(settlement):
+    """
+    returns the (quantity of goods, money) sold in a settlement, (0, 0) for None
+    """
+    if settlement is None:
+        return 0.0, 0.0
+    sold = np.array(list(settlement['sold'].values()), dtype=float).reshape(-1, 2)
+    return float(sold[:, 0].sum()), float(sold[:, 1].sum())
+
+
+def bid_count(bids):
+    """
+    returns the number of bids to single sellers, the nonzero quantities of the bid vectors
+    """
+    return sum(int(np.count_nonzero(quantities)) for _, quantities, _ in bids)
+
+
+def clear_bids(bids, offers):
+    """
+    clears the market for the bids and offers published by the agents
+
+    Args:   bids = list of (buyer name, quantity vector, price vector), the vectors are ordered by seller id
+            offers = list of dictionaries with the "name", "id", "price" and "quantity" of every seller
+
+    Returns: a settlement dictionary, settlement['bought'][buyer name] and settlement['sold'][seller name]
+             are (quantity of goods, money) pairs, settlement['goods'] and settlement['money'] the (buyers x
+             sellers) matrices of the quantities and the money, in the order of settlement['buyers'] and
+             settlement['sellers']
+    """
+    offers = sorted(offers, key=lambda offer: offer["id"])
+    ask_prices = np.array([offer["price"] for offer in offers], dtype=float)
+    inventories = np.array([offer["quantity"] for offer in offers], dtype=float)
+    if bids:
+        quantities = np.array([quantity for _, quantity, _ in bids], dtype=float)
+        bid_prices = np.array([price for _, _, price in bids], dtype=float)
+    else:
+        quantities = bid_prices = np.zeros((0, len(offers)))
+    sold = clear(quantities, bid_prices, ask_prices, inventories)
+    paid = sold * bid_prices
+    return {'bought': {name: (goods, money) for (name, _, _), goods, money in zip(bids, sold.sum(axis=1), paid.sum(axis=1))},
+            'sold': {offer["name"]: (goods, money) for offer, goods, money in zip(offers, sold.sum(axis=0), paid.sum(axis=0))},
+            'buyers': [name for name, _, _ in bids],
+            'sellers': [offer["name"] for offer in offers],
+            'goods': sold,
+            'money': paid}
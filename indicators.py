@@ -0,0 +1,71 @@
+"""
+Macro indicators computed online during the run.
+
+The agents reduce their state to a few numbers in the group calls of the daily loop (production,
+wage bills, dividends, the settlements of the markets and the snapshot calls), so every agent adds
+a constant amount of work per day. MacroIndicators turns these daily totals into running series
+without any panel logging:
+
+- gdp: the money spent on firm and farm goods
+- output: the goods the firms produced
+- price_index: the sales-weighted mean price of the firm goods, 100 on the first day with sales
+- employment_ratio: the workers the firms hired over their ideal_num_workers
+- labour_share: the wage bill over the wage bill and the dividends
+- money_velocity: gdp over the money stock of all agents, per day
+- farm_goods: the stock of farm goods, farm_sales the farm goods sold
+"""
+import numpy as np
+import pandas as pd
+
+
+INDICATORS = ('gdp', 'output', 'price_index', 'employment_ratio', 'labour_share', 'money_velocity',
+              'money_stock', 'farm_goods', 'farm_sales')
+
+
+def _ratio(numerator, denominator):
+    return numerator / denominator if denominator else np.nan
+
+
+class MacroIndicators:
+    """
+    Args:   num_days = the number of days of the run, the series are preallocated
+    """
+    def __init__(self, num_days):
+        self.series = {indicator: np.full(num_days, np.nan) for indicator in INDICATORS}
+        self.base_price = None
+        self.days = 0
+
+    def update(self, day, state):
+        """
+        adds a day and returns its indicators
+
+        Args:   day = the index of the day
+                state = a snapshot of main.simulate with the daily flows
+        """
+        sold, revenue = state['firm_sold']
+        farm_sold, farm_revenue = state['farm_sold']
+        mean_price = _ratio(revenue, sold)
+        if self.base_price is None and sold > 0:
+            self.base_price = mean_price
+        money_stock = state['firm_money'] + state['farm_money'] + state['people_money'] + state['farmers_money']
+        gdp = revenue + farm_revenue
+        values = {'gdp': gdp,
+                  'output': state['output'],
+                  'price_index': 100 * _ratio(mean_price, self.base_price) if self.base_price else np.nan,
+                  'employment_ratio': _ratio(state['firm_employment'], state['ideal_num_workers']),
+                  'labour_share': _ratio(state['wage_bill'], state['wage_bill'] + state['dividends']),
+                  'money_velocity': _ratio(gdp, money_stock),
+                  'money_stock': money_stock,
+                  'farm_goods': state['farm_goods'],
+                  'farm_sales': farm_sold}
+        for indicator, value in values.items():
+            self.series[indicator][day] = value
+        self.days = max(self.days, day + 1)
+        return values
+
+    def to_frame(self):
+        """
+        returns the series of the days so far, one row per day
+        """
+        return pd.DataFrame({indicator: values[:self.days] for indicator, values in self.series.items()},
+                            index=pd.RangeIndex(self.days, name='day'))
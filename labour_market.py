@@ -0,0 +1,96 @@
+"""
+Labour market clearing for all employers in one vectorized pass.
+
+A matching rule turns the wages offered into the number of workers of every household cohort willing
+to work for every employer. Employers hire the smaller of their vacancies and the willing workers,
+and learn how many workers were willing, which is their oversubscription signal. Every employer's
+workforce is drawn from the cohorts in proportion to their willing workers. Rules are registered
+with @matching_rule and chosen with the matching_rule parameter.
+"""
+import numpy as np
+
+
+MATCHING_RULES = {}
+
+
+def matching_rule(name):
+    def register(rule):
+        MATCHING_RULES[name] = rule
+        return rule
+    return register
+
+
+@matching_rule('wage_distance')
+def wage_distance(wages, population, wage_acceptance):
+    """
+    the people supply labour according to the distance of each wage to the highest wage
+    """
+    max_wage = wages.max()
+    distances = 1 - ((max_wage - wages) / max_wage) ** wage_acceptance
+    return population / distances.sum(axis=-1, keepdims=True) * distances
+
+
+@matching_rule('wage_share')
+def wage_share(wages, population, wage_acceptance):
+    """
+    the people supply labour in proportion to the wage raised to the power of wage_acceptance
+    """
+    weights = wages ** wage_acceptance
+    return population / weights.sum(axis=-1, keepdims=True) * weights
+
+
+def supply(wages, population, wage_acceptance, rule='wage_distance'):
+    """
+    returns the (cohorts x employers) matrix of the workers willing to work for every employer
+
+    Args:   wages = vector of the wages offered
+            population = the number of workers of every cohort, a vector or a number for a single cohort
+            wage_acceptance = parameter of the matching rule, per cohort or one for all
+            rule = the name of the matching rule
+    """
+    population = np.atleast_1d(np.asarray(population, dtype=float))[:, None]
+    wage_acceptance = np.atleast_1d(np.asarray(wage_acceptance, dtype=float))[:, None]
+    return MATCHING_RULES[rule](np.asarray(wages, dtype=float), population, wage_acceptance)
+
+
+def clear(numbers, wages, population, wage_acceptance, rule='wage_distance'):
+    """
+    clears the labour market
+
+    Args:   numbers = vector of the number of vacancies of every employer
+            wages, population, wage_acceptance, rule = as in supply
+
+    Returns: (hired, willing) vectors of the workers hired by and willing to work for every employer
+    """
+    willing = supply(wages, population, wage_acceptance, rule).sum(axis=0)
+    hired = np.minimum(np.asarray(numbers, dtype=float), willing)
+    return hired, willing
+
+
+def clear_vacancies(vacancies_list, households, rule='wage_distance'):
+    """
+    clears the labour market for the vacancies published by the agents
+
+    Args:   vacancies_list = the vacancies published by the firms and farms
+            households = list of (name, population, wage_acceptance, dividend_share) of the people cohorts
+
+    Returns: a dictionary with
+             'employers': employer name -> (workers hired, workers willing)
+             'cohorts': cohort name -> workers hired from the cohort
+             'employer_names', 'cohort_names' and 'shares', the (cohorts x employers) matrix of the shares
+             of the cohorts in the workforce of every employer
+    """
+    employer_names = [vacancy["name"] for vacancy in vacancies_list]
+    cohort_names = [name for name, _, _, _ in households]
+    numbers = np.fromiter((vacancy["number"] for vacancy in vacancies_list), dtype=float, count=len(vacancies_list))
+    wages = np.fromiter((vacancy["wage"] for vacancy in vacancies_list), dtype=float, count=len(vacancies_list))
+    by_cohort = supply(wages, [population for _, population, _, _ in households],
+                       [acceptance for _, _, acceptance, _ in households], rule)
+    willing = by_cohort.sum(axis=0)
+    hired = np.minimum(numbers, willing)
+    shares = np.divide(by_cohort, willing, out=np.zeros_like(by_cohort), where=willing > 0)
+    return {'employers': dict(zip(employer_names, zip(hired, willing))),
+            'cohorts': dict(zip(cohort_names, shares @ hired)),
+            'employer_names': employer_names,
+            'cohort_names': cohort_names,
+            'shares': shares}
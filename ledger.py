@@ -0,0 +1,188 @@
+"""
+Double-entry ledger of the transfers of a day with a conservation check.
+
+The phases of the day record every transfer of money and goods as arrays (from, to, good, amount):
+the wages and dividends of cohorts.household_income (record_income), the matrices of the goods
+markets (record_market), the profits of the farms, the goods the firms produce and the farms harvest,
+and the goods that are consumed or destroyed at the end of a harvest. Production, harvests, money
+injections and the like come from the 'source' account, what is consumed or destroyed goes to the
+'sink' account, money the farms prepay for an idle stretch waits in 'escrow' (see Farm.fast_forward).
+Accounts are named like the agents, abce names are (group, id) tuples; a list of names stands for
+many accounts, anything else for one.
+
+The ledger does not move anything, the agents change their possessions themselves. At the end of the
+day check nets the recorded transfers per account with one bincount (net_flows) and compares the
+opening balances plus the net flows with the balances the agents report, for every agent and checked
+good at once. A difference, or a transfer or balance that is not finite, raises LedgerError with the
+account and its transfers of the day. Agents that do not report, such as the farms during a
+fast-forward, are carried forward with their transfers and checked when they report again. The goods
+that are checked are the ones whose every change is recorded: money, the produce of the firms and the
+farm goods. Transfers of other goods are ignored.
+"""
+import numpy as np
+import pandas as pd
+
+
+EXTERNAL = ('source', 'sink', 'escrow')
+GOODS = ('money', 'produce', 'farm_goods')
+
+
+class LedgerError(Exception):
+    pass
+
+
+class LedgerAccount:
+    """
+    Mixin for abce agents: reports the balances the ledger checks
+    """
+    def balances(self, goods):
+        return self.name, [self[good] for good in goods]
+
+
+class Ledger:
+    """
+    Args:   balances = list of (account, balances of the goods) of all agents, the opening balances
+            goods = the checked goods
+            tolerance = the largest difference relative to the size of a balance
+    """
+    def __init__(self, balances, goods=GOODS, tolerance=1e-6):
+        self.goods = list(goods)
+        self.accounts = [name for name, _ in balances] + list(EXTERNAL)
+        self.index = {name: i for i, name in enumerate(self.accounts)}
+        self.checked = len(balances)
+        self.opening = np.array([values for _, values in balances], dtype=float).reshape(self.checked, len(self.goods))
+        self.tolerance = tolerance
+        self.reset()
+
+    def reset(self):
+        self.chunks = []
+
+    def record(self, sources, targets, good, amounts):
+        """
+        records transfers, the arguments are broadcast against each other
+
+        Args:   sources, targets = account names or lists of account names
+                good = the good transferred
+                amounts = the amounts, a number or an array
+        """
+        if good not in self.goods:
+            return
+        self._append(self.codes(sources), self.codes(targets), good, amounts)
+
+    def record_matrix(self, sources, targets, good, matrix):
+        """
+        records a (sources x targets) matrix of transfers, e.g. from the buyers to the sellers of a market
+
+        Args:   sources, targets = lists of account names
+        """
+        if good not in self.goods:
+            return
+        self._append(self.codes(sources)[:, None], self.codes(targets)[None, :], good, matrix)
+
+    def codes(self, names):
+        """
+        returns the account numbers of a list of names as an array, of a single name as a number
+        """
+        if isinstance(names, list):
+            return np.array([self.index[name] for name in names], dtype=np.int64)
+        return np.int64(self.index[names])
+
+    def _append(self, sources, targets, good, amounts):
+        sources, targets, amounts = np.broadcast_arrays(sources, targets, np.asarray(amounts, dtype=float))
+        self.chunks.append((sources.ravel(), targets.ravel(), self.goods.index(good), amounts.ravel()))
+
+    def transfers(self):
+        """
+        returns the transfers recorded since the last check, one array per column
+        """
+        if not self.chunks:
+            return (np.zeros(0, dtype=np.int64),) * 3 + (np.zeros(0),)
+        sources = np.concatenate([chunk[0] for chunk in self.chunks])
+        targets = np.concatenate([chunk[1] for chunk in self.chunks])
+        goods = np.concatenate([np.full(len(chunk[0]), chunk[2]) for chunk in self.chunks])
+        amounts = np.concatenate([chunk[3] for chunk in self.chunks])
+        return sources, targets, goods, amounts
+
+    def net_flows(self):
+        """
+        returns the net flows of the recorded transfers, an (accounts x goods) matrix
+        """
+        sources, targets, goods, amounts = self.transfers()
+        size = len(self.accounts) * len(self.goods)
+        inflow = np.bincount(targets * len(self.goods) + goods, amounts, minlength=size)
+        outflow = np.bincount(sources * len(self.goods) + goods, amounts, minlength=size)
+        return (inflow - outflow).reshape(len(self.accounts), len(self.goods))
+
+    def report(self, account):
+        """
+        returns the transfers of an account recorded since the last check as a DataFrame
+        """
+        sources, targets, goods, amounts = self.transfers()
+        touches = (sources == self.index[account]) | (targets == self.index[account])
+        return pd.DataFrame({'from': [self.accounts[i] for i in sources[touches]],
+                             'to': [self.accounts[i] for i in targets[touches]],
+                             'good': [self.goods[i] for i in goods[touches]], 'amount': amounts[touches]})
+
+    def check(self, balances, day):
+        """
+        checks that the opening balances plus the transfers of the day give the balances of the agents,
+        then starts the next day
+
+        Args:   balances = list of (account, balances of the goods) of the agents at the end of the day, the
+                           accounts that are missing are carried forward
+        """
+        sources, targets, goods, amounts = self.transfers()
+        bad = ~np.isfinite(amounts)
+        if bad.any():
+            i = np.flatnonzero(bad)[0]
+            raise LedgerError('day %i: transfer of %s %s from %s to %s' % (day, amounts[i], self.goods[goods[i]],
+                                                                           self.accounts[sources[i]],
+                                                                           self.accounts[targets[i]]))
+        flows = self.net_flows()[:self.checked]
+        closing = self.opening + flows
+        for name, values in balances:
+            closing[self.index[name]] = values
+        difference = closing - self.opening - flows
+        bad = ~(np.abs(difference) <= self.tolerance * np.maximum(1, np.abs(closing)))
+        if bad.any():
+            account, good = np.argwhere(bad)[0]
+            name = self.accounts[account]
+            raise LedgerError('day %i: %s has %s %s, the transfers give %s, the transfers of the day:\n%s'
+                              % (day, name, closing[account, good], self.goods[good],
+                                 closing[account, good] - difference[account, good], self.report(name)))
+        self.opening = closing
+        self.reset()
+
+
+def record_income(book, allocation, wage_bills, dividends, households):
+    """
+    records the wages and dividends that cohorts.household_income splits among the cohorts
+
+    Args:   book = the Ledger of the day
+            wage_bills, dividends = dictionaries from employer name to the wages and dividends it paid
+    """
+    bills = np.array([wage_bills.get(name, 0) for name in allocation['employer_names']], dtype=float)
+    book.record_matrix(allocation['employer_names'], allocation['cohort_names'], 'money',
+                       (allocation['shares'] * bills).T)
+    shares = np.array([share for _, _, _, share in households])
+    book.record_matrix(list(dividends), [name for name, _, _, _ in households], 'money',
+                       np.outer(list(dividends.values()), shares))
+
+
+def record_market(book, settlement, good):
+    """
+    records the goods and the money of a settlement of goods_market.clear_bids
+    """
+    book.record_matrix(settlement['buyers'], settlement['sellers'], 'money', settlement['money'])
+    book.record_matrix(settlement['sellers'], settlement['buyers'], good, settlement['goods'].T)
+
+
+class NullLedger:
+    """
+    records nothing, for runs with ledger_check=False
+    """
+    def record(self, sources, targets, good, amounts):
+        pass
+
+    def record_matrix(self, sources, targets, good, matrix):
+        pass
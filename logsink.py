@@ -0,0 +1,176 @@
+import glob
+import os
+import numpy as np
+import pandas as pd
+import timeseries
+
+
+class ColumnarLog:
+    """
+    Buffers the logged records of one agent group in typed columns and writes them in bulk.
+
+    Every record is (round, agent id, variable, value). The columns are numpy arrays that grow by
+    doubling, and every `chunk` records they are written to one compressed npz (or Parquet) part. The
+    days are counted in the order their rounds are first logged, agents may log ahead (see log_at).
+
+    Args:   path = directory the parts are written to
+            group = the name of the agent group
+            variables = whitelist of the variables that are kept, None keeps all
+            every = only every `every`th simulated day is kept
+            log_format = 'npz' or 'parquet'
+    """
+    def __init__(self, path, group, variables=None, every=1, log_format='npz', chunk=2 ** 20):
+        self.path = path
+        self.group = group
+        self.variables = None if variables is None else set(variables)
+        self.every = every
+        self.log_format = log_format
+        self.chunk = chunk
+        self.codes = {}
+        self.part = 0
+        self.day_of = {}
+        self._allocate(1024)
+
+    def _allocate(self, capacity):
+        self.size = 0
+        self.round = np.empty(capacity, dtype=np.int64)
+        self.id = np.empty(capacity, dtype=np.int32)
+        self.variable = np.empty(capacity, dtype=np.int16)
+        self.value = np.empty(capacity, dtype=np.float64)
+
+    def _grow(self):
+        capacity = 2 * len(self.value)
+        for column in ('round', 'id', 'variable', 'value'):
+            old = getattr(self, column)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, column, new)
+
+    def add(self, time, id, variable, value):
+        day = self.day_of.setdefault(time, len(self.day_of))
+        if day % self.every or (self.variables is not None and variable not in self.variables):
+            return
+        if self.size == len(self.value):
+            if self.size >= self.chunk:
+                self.flush()
+            else:
+                self._grow()
+        code = self.codes.setdefault(variable, len(self.codes))
+        self.round[self.size] = time
+        self.id[self.size] = id
+        self.variable[self.size] = code
+        self.value[self.size] = value
+        self.size += 1
+
+    def flush(self):
+        """
+        writes the buffered records to the next part file and empties the buffer
+        """
+        if self.size == 0:
+            return
+        filename = '%s/log_%s_%i_%i.%s' % (self.path, self.group, os.getpid(), self.part, self.log_format)
+        names = np.array(sorted(self.codes, key=self.codes.get))
+        columns = dict(round=self.round[:self.size], id=self.id[:self.size],
+                       variable=self.variable[:self.size], value=self.value[:self.size])
+        if self.log_format == 'parquet':
+            df = pd.DataFrame(columns)
+            df['variable'] = pd.Categorical.from_codes(df['variable'], names)
+            df.to_parquet(filename)
+        else:
+            np.savez_compressed(filename, names=names, **columns)
+        self.part += 1
+        self._allocate(len(self.value))
+
+
+class NullLog:
+    """
+    drops every record, for runs that are only consumed through main.simulate
+    """
+    def add(self, time, id, variable, value):
+        pass
+
+    def flush(self):
+        pass
+
+
+_sinks = {}
+
+
+class SinkLogging:
+    """
+    Mixin for abce agents that routes self.log to a ColumnarLog when one is opened, and to the abce
+    csv logging otherwise.
+
+    The sinks are per process and per group, so the mixin works with any number of processes. Every
+    open_log replaces the sink of the group, so a run never writes into the sink of an earlier run in the
+    same process; the agents of a group open their log before any of them logs.
+    """
+    def open_log(self, path, log_backend='csv', log_variables=None, log_every=1, log_format='npz', **_):
+        if log_backend == 'columnar':
+            _sinks[self.group] = ColumnarLog(path, self.group, log_variables, log_every, log_format)
+        elif log_backend == 'timeseries':
+            _sinks[self.group] = timeseries.STORE.sink(self.group, log_variables, log_every, path)
+        elif log_backend == 'none':
+            _sinks[self.group] = NullLog()
+        else:
+            _sinks.pop(self.group, None)
+
+    def log(self, action_name, data_to_log):
+        sink = _sinks.get(self.group)
+        if sink is None:
+            return super().log(action_name, data_to_log)
+        if isinstance(data_to_log, dict):
+            for key, value in data_to_log.items():
+                sink.add(self.time, self.id, '%s_%s' % (action_name, key), value)
+        else:
+            sink.add(self.time, self.id, action_name, data_to_log)
+
+    def log_at(self, time, action_name, data_to_log):
+        """
+        logs a number for another round than the current one, e.g. for the days of a fast-forward; the
+        abce csv logging only logs the current round, so this needs the columnar, timeseries or none backend
+        """
+        _sinks[self.group].add(time, self.id, action_name, data_to_log)
+
+    def log_panel(self, variables=(), goods=()):
+        """
+        logs attributes and possessions of the agent, like abce's panel_log
+        """
+        for variable in variables:
+            self.log(variable, getattr(self, variable))
+        for good in goods:
+            self.log(good, self[good])
+
+    def flush_log(self):
+        sink = _sinks.get(self.group)
+        if sink is not None:
+            sink.flush()
+
+
+def read_panel(path, group):
+    """
+    reads the panel of an agent group in the wide format of abce's csv panels (round, name, variables...),
+    from the columnar parts when there are any, from panel_<group>.csv otherwise and from the time-series
+    store when the run logged there
+    """
+    parts = sorted(glob.glob('%s/log_%s_*' % (path, group)))
+    if not parts:
+        filename = '%s/panel_%s.csv' % (path, group)
+        if not os.path.exists(filename) and timeseries.STORE.logged(path, group):
+            return timeseries.STORE.to_panel(group)
+        return pd.read_csv(filename)
+    frames = []
+    for part in parts:
+        if part.endswith('.parquet'):
+            frames.append(pd.read_parquet(part))
+        else:
+            with np.load(part) as data:
+                df = pd.DataFrame({column: data[column] for column in ('round', 'id', 'variable', 'value')})
+                df['variable'] = data['names'][df['variable'].to_numpy()]
+                frames.append(df)
+    long = pd.concat(frames, ignore_index=True)
+    long['variable'] = long['variable'].astype(str)
+    panel = long.pivot_table(index=['round', 'id'], columns='variable', values='value', aggfunc='last')
+    panel = panel.reset_index().rename_axis(columns=None)
+    panel.insert(1, 'name', group + panel.pop('id').astype(str))
+    return panel
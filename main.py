@@ -1,19 +1,38 @@
 import abce
+import numpy as np
 import pandas as pd
-import os
+import json
+import uuid
 from firm import Firm
 from people import People
 from farm import Farm
 from farmers_class import Farmers
-import  plotly
-import plotly.plotly as py
-import plotly.graph_objs as go
-plotly.tools.set_credentials_file(username='MayaKearney', api_key='XekHnBBOjROj1uJjKb8y')
+import fast_firms
+import postprocess
+import tracing
+import checkpoint
+import labour_market
+import goods_market
+import cohorts
+import schedule
+import farm_cycle
+import rng
+import agent_state
+import convergence
+import indicators
+import price_board
+import phases
+import ledger
+from profiler import PhaseProfiler, NullProfiler
 
 
 
 params = dict(
     population=10000,
+    num_cohorts=1,  # number of People agents the population is split into (see cohorts.py)
+    cohort_money_spread=0,  # standard deviation of the lognormal split of people_money among the cohorts
+    cohort_acceptance_spread=0,  # log-spread of wage_acceptance among the cohorts
+    processes=1,  # number of processes abce spreads the agents across
     farmers_population=10000,
     people_money=1000,
     farmers_money=500,
@@ -24,6 +43,7 @@ params = dict(
     farm_workers=5,
     farm_land=1000,
     harvest_per_day=100,
+    farm_fast_forward=False,  # apply the idle days outside harvest to the farms in one step, needs a log_backend other than 'csv' (see farm_cycle.py)
     goods_per_land=10,
     goods_per_worker=500,
     goods_price=30,
@@ -47,133 +67,489 @@ params = dict(
     price_increment=0.01,
     worker_increment=0.01,
     productivity=1,
-    wage_acceptance=1)
-simulation = abce.Simulation(name='economy', processes=1)
-group_of_firms = simulation.build_agents(Firm, "firm", number=params["num_firms"], **params)
-people = simulation.build_agents(People, "people", number=1, **params)
-farms = simulation.build_agents(Farm, "farm", number=params["num_farms"], **params)
-farmers = simulation.build_agents(Farmers, "farmers", number=1, **params)
-
-
-def main(params):
-
-    for date in pd.date_range(start='1/1/1880', periods=params['num_days'], freq='D'):
-        simulation.time = int(('%04i' % date.year)[2:] + '%02i' % date.month + '%02i' % date.day)
-
-        group_of_firms.panel_log(variables=['ideal_num_workers'], goods=['workers'])
-
-
-        people.create_labour()
-        print(date.dayofyear, end='')
+    wage_acceptance=1,
+    matching_rule='wage_distance',  # how the people choose their employers (see labour_market.py)
+
+    log_backend='csv',  # 'csv' logs through abce, 'columnar' buffers the logs in memory (see logsink.py),
+                        # 'timeseries' keeps (agent x day) matrices in memory (see timeseries.py), 'none' logs nothing
+    log_variables=None,  # whitelist of the logged variables of the columnar and timeseries backends, None logs all
+    log_every=1,  # the columnar backend keeps every log_every-th day
+    log_format='npz',  # 'npz' or 'parquet'
+
+    graphs=[],  # (agent group, variable) pairs that are graphed after the run, e.g. ('farm', 'money')
+    graph_format='html',  # 'html' (offline plotly) or 'png'
+
+    profile=False,  # record time, calls and messages per phase and agent group (see profiler.py)
+    memory_report=False,  # print and save the memory used per agent type after the run (see agent_state.py)
+    trace=None,  # level of the tracing output: None, 'INFO' (one mark per day) or 'DEBUG'
+
+    convergence_test=None,  # None runs all num_days, 'seasonal' or 'window' detects a steady state (see convergence.py)
+    convergence_variables=('price', 'firm_wage', 'ideal_num_workers', 'firm_money_gini'),
+    convergence_window=90,  # days of a window of the convergence test
+    convergence_tolerance=0.01,  # largest relative change of the variables in a steady state
+    on_convergence='stop',  # 'stop' ends the run, 'quiet' continues without logging
+
+    checkpoint_every=None,  # number of days between two checkpoints, None takes none (see checkpoint.py)
+    resume_from=None,  # checkpoint file the run continues from
+
+    seed=None,  # random seed of the run, None draws a fresh one, every agent has its own stream (see rng.py)
+    ledger_check=True,  # record the transfers of every day and check that they conserve money and goods (see ledger.py)
+    engine='abce')  # 'abce' runs every firm as an agent, 'fast' runs the firm sector as arrays (see fast_firms.py)
+
+
+def build_simulation(params):
+    """
+    builds the simulation and the agent groups from the parameters
+    """
+    simulation = abce.Simulation(name='economy', random_seed=params['seed'], processes=params['processes'])
+    board = price_board.create({'firm': params['num_firms'], 'farm': params['num_farms']},
+                               shared=params['processes'] > 1)
+    params = dict(params, board=board.spec, run_id=uuid.uuid4().hex)
+    group_of_firms = simulation.build_agents(Firm, "firm", number=params["num_firms"], **params)
+    people = simulation.build_agents(People, "people", agent_parameters=cohorts.cohort_parameters(params), **params)
+    farms = simulation.build_agents(Farm, "farm", number=params["num_farms"], **params)
+    farmers = simulation.build_agents(Farmers, "farmers", number=1, **params)
+    (group_of_firms + people + farms + farmers).open_log(path=simulation.path, **params)
+    return simulation, board, group_of_firms, people, farms, farmers
+
+
+def snapshot(day, date, path, allocation, flows, firms, people, farm_rows, farmers):
+    """
+    returns the aggregate state of the economy at the end of a day as a dictionary of numbers, together
+    with the flows of the day
+
+    Args:   farm_rows = the results of Farm.snapshot, see farm_snapshot
+    """
+    firm_price, firm_wage, firm_money, produce, ideal_num_workers = np.array(list(firms.snapshot()), dtype=float).T
+    farm_price, farm_wage, farm_money, farm_goods = np.array(farm_rows, dtype=float).reshape(-1, 4).T
+    people_money, income = np.array(list(people.snapshot()), dtype=float).T
+    return {'day': day,
+            'date': date,
+            'path': path,
+            'price': firm_price.mean(),
+            'firm_wage': firm_wage.mean(),
+            'farm_price': farm_price.mean(),
+            'farm_wage': farm_wage.mean(),
+            'employment': sum(hired for hired, _ in allocation['employers'].values()),
+            'ideal_num_workers': ideal_num_workers.sum(),
+            'firm_money': firm_money.sum(),
+            'firm_money_gini': cohorts.gini(firm_money),
+            'farm_money': farm_money.sum(),
+            'people_money': people_money.sum(),
+            'farmers_money': sum(farmers.snapshot()),
+            'income': income.sum(),
+            'produce': produce.sum(),
+            'farm_goods': farm_goods.sum(),
+            **flows}
+
+
+def farm_snapshot(context):
+    """
+    returns the rows of Farm.snapshot of the day, during a fast-forward from the stretch without
+    calling the farms
+    """
+    if context['fast_forward_left']:
+        return context['stretch'].snapshot(context['day'])
+    return list(context['farms'].snapshot())
+
+
+def reporting(context, groups):
+    """
+    returns the agent groups that report their balances to the ledger, the farms do not during a fast-forward
+    """
+    firms, people, farms, farmers = groups
+    return firms + people + farmers if context['fast_forward_left'] else firms + people + farms + farmers
+
+
+def convergence_monitor(params):
+    if params['convergence_test'] is None:
+        return None
+    return convergence.ConvergenceMonitor(params['convergence_variables'], params['convergence_test'],
+                                          params['convergence_window'], params['convergence_tolerance'])
+
+
+def settle_farm_profits(c, days):
+    """
+    pays the profits of the farms to the farmers, see Farm.redistribute_profits
+    """
+    profits = dict(c['farms'].redistribute_profits(days=days))
+    c['farmers'].receive_farm_profits(sum(profits.values()))
+    c['ledger'].record(list(profits), 'farmers', 'money', list(profits.values()))
+
+
+def daily_phases(params, cohort_names, harvest, profiler=NullProfiler()):
+    """
+    returns the phases of a harvest day or of a day outside harvest in the order of the original daily
+    loop, with the resources they read and write (see phases.py), the phases count their messages with
+    the profiler. Outside harvest the farms are not on the labour and goods markets, so their phases
+    only conflict with each other and run alongside the firms.
+    """
+    rule = params['matching_rule']
+
+    def farms_active(c):
+        return not c['fast_forward_left']
+
+    def log_panel(c):
+        c['firms'].log_panel(variables=['ideal_num_workers'], goods=['workers'])
+
+    def create_labour(c):
+        c['people'].create_labour()
+
+    def reset_days_left(c):
+        c['farms'].reset_days_left()
+
+    def harvest_phase(c):
+        harvested = dict(c['farms'].harvest())
+        c['ledger'].record('source', list(harvested), 'farm_goods', list(harvested.values()))
+        c['farms'].find_ideal_workers()
+
+    def vacancies(c):
+        employers = c['firms'] + c['farms'] if harvest else c['firms']
+        c['vacancies'] = list(employers.publish_vacancies())
+
+    def labour_market_phase(c):
+        c['allocation'] = labour_market.clear_vacancies(c['vacancies'], c['households'], rule)
+
+    def send_workers(c):
+        c['people'].send_workers(c['allocation']['cohorts'])
+
+    def hire_firms(c):
+        c['firms'].hire(c['allocation'])
+
+    def hire_farms(c):
+        c['farms'].hire(c['allocation'])
+
+    def transport_goods(c):
+        c['farm_wages'] = dict(c['farms'].transport_goods())
+
+    def farm_income(c):
+        c['people'].receive_income(cohorts.household_income(c['allocation'], c['farm_wages'], 0, c['households']))
+        ledger.record_income(c['ledger'], c['allocation'], c['farm_wages'], {}, c['households'])
+
+    def farm_prices(c):
+        profiler.count('send_prices', 'farm', len(list(c['farms'].send_prices())))
+        c['prices.farm'].publish(c['day'])
+
+    def farm_bids(c):
+        c['prices.farm'].current(c['day'])
+        c['farm_bids'] = [bid for bid in c['people'].buy_farm_goods() if bid is not None]
+        profiler.count('buy_farm_goods', 'people', len(c['farm_bids']) + goods_market.bid_count(c['farm_bids']))
+
+    def farm_market(c):
+        c['farm_settlement'] = goods_market.clear_bids(c['farm_bids'], list(c['farms'].publish_supply()))
+
+    def receive_farm_goods(c):
+        c['people'].receive_goods(c['farm_settlement'], 'farm_goods')
+        ledger.record_market(c['ledger'], c['farm_settlement'], 'farm_goods')
+
+    def sell_harvest(c):
+        farms = c['farms']
+        farms.sell_harvest(c['farm_settlement'])
+        farms.change_price()
+        farms.determine_wage()
+        settle_farm_profits(c, days=366 - c['dayofyear'])
+        destroyed = dict(farms.end_harvest())
+        c['ledger'].record(list(destroyed), 'sink', 'farm_goods', list(destroyed.values()))
+
+    def start_fast_forward(c):
+        return params['farm_fast_forward'] and not c['fast_forward_left'] and c['idle']
+
+    def fast_forward(c):
+        day = c['day']
+        fast_forward_left = c['idle']
+        if params['checkpoint_every']:
+            fast_forward_left = min(fast_forward_left, params['checkpoint_every'] - day % params['checkpoint_every'])
+        c['fast_forward_left'] = fast_forward_left
+        times = c['calendar'].plan['time'][day:day + fast_forward_left].tolist()
+        stretch = farm_cycle.Stretch(day, list(c['farms'].fast_forward(fast_forward_left, 365 - c['dayofyear'], times)))
+        c['ledger'].record(stretch.names, 'escrow', 'money', stretch.transfers * fast_forward_left)
+        c['stretch'] = stretch
+
+    def grow_crops(c):
+        c['farms'].grow_crops()
+
+    def farm_profits(c):
+        if c['fast_forward_left']:
+            paid = c['stretch'].transfers.sum()
+            c['farmers'].receive_farm_profits(paid)
+            c['ledger'].record('escrow', 'farmers', 'money', paid)
+        else:
+            settle_farm_profits(c, days=365 - c['dayofyear'])
+
+    def log_sales(c):
+        c['farms'].log_sales()
+
+    def production(c):
+        produced = dict(c['firms'].production())
+        c['output'] = sum(produced.values())
+        c['ledger'].record('source', list(produced), 'produce', list(produced.values()))
+
+    def pay(c):
+        c['wage_bills'] = dict(c['firms'].pay_workers())
+        c['dividends'] = dict(c['firms'].pay_dividents())
+
+    def income(c):
+        dividends = sum(c['dividends'].values())
+        c['people'].receive_income(cohorts.household_income(c['allocation'], c['wage_bills'], dividends,
+                                                            c['households']))
+        ledger.record_income(c['ledger'], c['allocation'], c['wage_bills'], c['dividends'], c['households'])
+
+    def firm_prices(c):
+        profiler.count('send_prices', 'firm', len(list(c['firms'].send_prices())))
+        c['prices.firm'].publish(c['day'])
+
+    def bids(c):
+        c['prices.firm'].current(c['day'])
+        c['bids'] = list((c['people'] + c['farmers']).buy_goods())
+        profiler.count('buy_goods', 'people+farmers', len(c['bids']) + goods_market.bid_count(c['bids']))
+
+    def goods_market_phase(c):
+        c['settlement'] = goods_market.clear_bids(c['bids'], list(c['firms'].publish_supply()))
+
+    def receive_goods(c):
+        (c['people'] + c['farmers']).receive_goods(c['settlement'], 'produce')
+        ledger.record_market(c['ledger'], c['settlement'], 'produce')
+
+    def sell_goods(c):
+        c['firms'].sell_goods(c['settlement'])
+        c['firms'].determine_bounds(demand=sum(demand for name, demand, _ in c['bids'] if name in cohort_names))
+
+    def print_firms(c):
+        c['firms'].print_possessions()
+
+    def print_people(c):
+        c['people'].print_possessions()
+
+    def print_farms(c):
+        c['farms'].print_possessions()
+
+    def adjust_firms(c):
+        firms = c['firms']
+        firms.determine_wage()
+        firms.expand_or_change_price()
+        firms.destroy_unused_labor()
+
+    def people_end_of_day(c):
+        people = c['people']
+        people.destroy_unused_labor()
+        consumed = dict(people.consumption())
+        c['ledger'].record(list(consumed), 'sink', 'produce', list(consumed.values()))
+
+    def farmers_consumption(c):
+        consumed = dict(c['farmers'].consumption())
+        c['ledger'].record(list(consumed), 'sink', 'produce', list(consumed.values()))
+
+    def determine_profits(c):
+        c['firms'].determine_profits()
+
+    def consume_farm_goods(c):
+        consumed = dict(c['people'].consume_farm_goods())
+        c['ledger'].record(list(consumed), 'sink', 'farm_goods', list(consumed.values()))
+
+    def count_down(c):
+        if c['fast_forward_left']:
+            c['fast_forward_left'] -= 1
+
+    Phase = phases.Phase
+    start_of_day = [
+        Phase('log_panel', log_panel, writes={'firms'}),
+        Phase('create_labour', create_labour, writes={'people'}),
+        Phase('reset_days_left', reset_days_left, reads={'mask'}, writes={'farms'},
+              when=lambda c: c['mask'] & schedule.HARVEST_START)]
+    if harvest:
+        labour = [
+            Phase('harvest', harvest_phase, writes={'farms', 'ledger'}),
+            Phase('vacancies', vacancies, reads={'firms', 'farms'}, writes={'vacancies'}),
+            Phase('labour_market', labour_market_phase, reads={'vacancies', 'households'}, writes={'allocation'}),
+            Phase('send_workers', send_workers, reads={'allocation'}, writes={'people'}),
+            Phase('hire_firms', hire_firms, reads={'allocation'}, writes={'firms'}),
+            Phase('hire_farms', hire_farms, reads={'allocation'}, writes={'farms'}),
+            Phase('transport_goods', transport_goods, writes={'farms', 'farm_wages'}),
+            Phase('farm_income', farm_income, reads={'allocation', 'farm_wages', 'households'},
+                  writes={'people', 'ledger'}),
+            Phase('farm_prices', farm_prices, reads={'farms', 'day'}, writes={'prices.farm'}),
+            Phase('farm_bids', farm_bids, reads={'prices.farm', 'day'}, writes={'people', 'farm_bids'}),
+            Phase('farm_market', farm_market, reads={'farm_bids', 'farms'}, writes={'farm_settlement'}),
+            Phase('receive_farm_goods', receive_farm_goods, reads={'farm_settlement'}, writes={'people', 'ledger'}),
+            Phase('sell_harvest', sell_harvest, reads={'farm_settlement', 'dayofyear'},
+                  writes={'farms', 'farmers', 'ledger'})]
+    else:
+        labour = [
+            Phase('vacancies', vacancies, reads={'firms'}, writes={'vacancies'}),
+            Phase('labour_market', labour_market_phase, reads={'vacancies', 'households'}, writes={'allocation'}),
+            Phase('send_workers', send_workers, reads={'allocation'}, writes={'people'}),
+            Phase('hire_firms', hire_firms, reads={'allocation'}, writes={'firms'}),
+            Phase('fast_forward', fast_forward, reads={'day', 'dayofyear', 'idle', 'calendar'},
+                  writes={'farms', 'fast_forward_left', 'stretch', 'ledger'}, when=start_fast_forward),
+            Phase('grow_crops', grow_crops, reads={'fast_forward_left'}, writes={'farms'}, when=farms_active),
+            Phase('farm_profits', farm_profits, reads={'dayofyear', 'fast_forward_left', 'stretch'},
+                  writes={'farms', 'farmers', 'ledger'})]
+    return start_of_day + labour + [
+        Phase('log_sales', log_sales, reads={'fast_forward_left'}, writes={'farms'}, when=farms_active),
+        Phase('production', production, writes={'firms', 'output', 'ledger'}),
+        Phase('pay', pay, writes={'firms', 'wage_bills', 'dividends'}),
+        Phase('income', income, reads={'allocation', 'wage_bills', 'dividends', 'households'},
+              writes={'people', 'ledger'}),
+        Phase('firm_prices', firm_prices, reads={'firms', 'day'}, writes={'prices.firm'}),
+        Phase('bids', bids, reads={'prices.firm', 'day'}, writes={'people', 'farmers', 'bids'}),
+        Phase('goods_market', goods_market_phase, reads={'bids', 'firms'}, writes={'settlement'}),
+        Phase('receive_goods', receive_goods, reads={'settlement'}, writes={'people', 'farmers', 'ledger'}),
+        Phase('sell_goods', sell_goods, reads={'settlement', 'bids'}, writes={'firms'}),
+        Phase('print_firms', print_firms, writes={'firms'}),
+        Phase('print_people', print_people, writes={'people'}),
+        Phase('print_farms', print_farms, reads={'fast_forward_left'}, writes={'farms'}, when=farms_active),
+        Phase('adjust_firms', adjust_firms, writes={'firms'}),
+        Phase('people_end_of_day', people_end_of_day, writes={'people', 'ledger'}),
+        Phase('farmers_consumption', farmers_consumption, writes={'farmers', 'ledger'}),
+        Phase('determine_profits', determine_profits, writes={'firms'}),
+        Phase('consume_farm_goods', consume_farm_goods, writes={'people', 'ledger'}),
+        Phase('count_down', count_down, writes={'fast_forward_left'}),
+    ]
+
+
+def simulate(params):
+    """
+    runs the simulation and yields a snapshot of the aggregate state at the end of every day
+
+    Nothing has to touch the disk: with log_backend='none' nothing is logged and the snapshots are plain
+    dictionaries that can be sent to another process. The caller can stop early by leaving the loop, the
+    logs are flushed when the generator is closed, graphs and reports are only made when the run is complete.
+    The fast engine yields its daily aggregates instead (see fast_firms.simulate).
+
+    With a convergence_test the snapshot of the day a steady state is detected has a 'converged' entry
+    that records when and why, the run then stops or continues without logging (on_convergence).
+    Every snapshot carries the macro indicators of the day, which are also written to indicators.csv
+    unless the run logs nothing (see indicators.py).
+
+    A shock sent into the generator, a function of the agent groups by name and the context of the phases,
+    is applied at the end of the day of the last snapshot (see scenarios.py).
+    """
+    if params['farm_fast_forward'] and params['engine'] == 'abce' and params['log_backend'] == 'csv':
+        raise ValueError('the farm fast-forward logs the days of a stretch ahead, the csv backend cannot')
+    if params['seed'] is None:
+        params = dict(params, seed=rng.fresh_seed())
+    monitor = convergence_monitor(params)
+    if params['engine'] == 'fast':
+        for aggregates in fast_firms.simulate(params, seed=params['seed']):
+            if monitor is not None and monitor.update(dict(aggregates, day=aggregates['round'])):
+                aggregates['converged'] = monitor.converged
+                yield aggregates
+                if params['on_convergence'] == 'stop':
+                    break
+            else:
+                yield aggregates
+        if params['memory_report']:
+            print(fast_firms.memory_report(params))
+        return
+
+    simulation, board, group_of_firms, people, farms, farmers = build_simulation(params)
+    tracing.set_level(params['trace'])
+    profiler = PhaseProfiler() if params['profile'] else NullProfiler()
+    group_of_firms = profiler.instrument(group_of_firms, 'firm')
+    people = profiler.instrument(people, 'people')
+    farms = profiler.instrument(farms, 'farm')
+    farmers = profiler.instrument(farmers, 'farmers')
+    groups = [group_of_firms, people, farms, farmers]
+
+    start = 0
+    if params['resume_from'] is not None:
+        start = checkpoint.restore(params['resume_from'], groups)['day']
+    households = list(people.publish_labour_supply())
+    cohort_names = [name for name, _, _, _ in households]
+
+    calendar = schedule.compile_schedule(params['num_days'], params['harvest_start'], params['days_harvest'])
+    macro = indicators.MacroIndicators(params['num_days'])
+    graphs = {harvest: phases.PhaseGraph(daily_phases(params, cohort_names, harvest, profiler))
+              for harvest in (False, True)}
+    if params['ledger_check']:
+        book = ledger.Ledger(list((group_of_firms + people + farms + farmers).balances(ledger.GOODS)))
+    else:
+        book = ledger.NullLedger()
+    context = {'params': params, 'households': households, 'prices.firm': price_board.Prices(board, 'firm'),
+               'prices.farm': price_board.Prices(board, 'farm'), 'firms': group_of_firms,
+               'people': people, 'farms': farms, 'farmers': farmers, 'ledger': book, 'fast_forward_left': 0,
+               'stretch': None, 'calendar': calendar}
+    try:
+        for day, time, dayofyear, mask, idle in calendar.days(start):
+            simulation.time = time
+            profiler.start_day(day)
+            harvest = bool(mask & schedule.HARVEST)
+            tracing.day(dayofyear, harvest)
+            context.update(day=day, dayofyear=dayofyear, mask=mask, idle=idle, farm_settlement=None)
+            phases.run_day(graphs[harvest], context)
+            allocation, wage_bills, settlement = context['allocation'], context['wage_bills'], context['settlement']
+            if params['ledger_check']:
+                book.check(list(reporting(context, groups).balances(book.goods)), day)
+
+            if params['checkpoint_every'] and (day + 1) % params['checkpoint_every'] == 0:
+                checkpoint.save('%s/checkpoint_%i.pkl.gz' % (simulation.path, day + 1), day + 1, simulation.time,
+                                params, groups)
+
+            flows = {'output': context['output'],
+                     'wage_bill': sum(wage_bills.values()),
+                     'dividends': sum(context['dividends'].values()),
+                     'firm_employment': sum(allocation['employers'][name][0] for name in wage_bills),
+                     'firm_sold': goods_market.sold_total(settlement),
+                     'farm_sold': goods_market.sold_total(context['farm_settlement'])}
+            state = snapshot(day, calendar.dates[day], simulation.path, allocation, flows, group_of_firms, people,
+                             farm_snapshot(context), farmers)
+            state.update(macro.update(day, state))
+            if monitor is not None and monitor.update(state):
+                state['converged'] = monitor.converged
+                with open(simulation.path + '/convergence.json', 'w') as f:
+                    json.dump(monitor.converged, f, indent=1)
+                tracing.info('steady state on day %i: %s', day, monitor.converged['reason'])
+                if params['on_convergence'] == 'stop':
+                    yield state
+                    break
+                (group_of_firms + people + farms + farmers).flush_log()
+                (group_of_firms + people + farms + farmers).open_log(path=simulation.path, log_backend='none')
+            shock = yield state
+            if shock is not None:
+                shock({'firm': group_of_firms, 'people': people, 'farm': farms, 'farmers': farmers}, context)
+    finally:
+        (group_of_firms + people + farms + farmers).flush_log()
+        board.close()
 
-        if params['harvest_start'] == date.dayofyear:
-            farms.reset_days_left()
-        if params['harvest_start'] < date.dayofyear < params['harvest_start'] + params['days_harvest'] and date.year > 1880:
-            print('*')
-            farms.harvest()
-            farms.find_ideal_workers()
+    print('done')
 
-            vacancies_list = list((group_of_firms + farms).publish_vacancies())
-            people.send_workers(vacancies_list)
+    #os.remove(simulation.path + 'panel_people.csv')
+    path = simulation.path
+    if params['log_backend'] != 'none':
+        macro.to_frame().to_csv(path + '/indicators.csv')
+    if params['log_backend'] == 'csv':
+        simulation.graph()
 
-            farms.transport_goods()
-            farms.send_prices()
-            (people).get_prices()
-            (people).buy_farm_goods()
-            farms.sell_harvest()
-            farms.change_price()
-            farms.determine_wage()
-            farms.redistribute_profits(days=366 - date.dayofyear)
-            farms.end_harvest()
+    if params['memory_report']:
+        report = agent_state.memory_report(groups)
+        report.to_csv(path + '/memory.csv')
+        print(report)
 
-        else:
-            print('.')
-            farms.grow_crops()
-            vacancies_list = list(group_of_firms.publish_vacancies())
-            people.send_workers(vacancies_list)
-            farms.redistribute_profits(days=365 - date.dayofyear)
-
-        farms.log_sales()
-
-        group_of_firms.production()
-        group_of_firms.pay_workers()
-        group_of_firms.pay_dividents()
-        group_of_firms.send_prices()
-        (people + farmers).get_prices()
-        demand = (people + farmers).buy_goods()
-
-        group_of_firms.sell_goods()
-        group_of_firms.determine_bounds(demand=list(demand)[0])
-        (group_of_firms + people + farms).print_possessions()
-        group_of_firms.determine_wage()
-        group_of_firms.expand_or_change_price()
-        (people + group_of_firms).destroy_unused_labor()
-        (people + farmers).consumption()
-        group_of_firms.determine_profits()
-
-        people.consume_farm_goods()
-        farmers.dassert()
+    if params['profile']:
+        profiler.write_json(path + '/profile.json')
+        profiler.write_csv(path + '/profile.csv')
+        profiler.write_folded(path + '/profile.folded')
+        print(profiler.summary())
 
+    if params['graphs']:
+        postprocess.report(path, params['graphs'], kind=params['graph_format'])
 
-    print('done')
 
-    #simulation.graph()
-    #os.remove(simulation.path + 'panel_people.csv')
-    path = simulation.path
-    simulation.graph()
-
-    def GraphFn(graphing_variable, agent):
-        """
-        function that takes in graphing variable as parameter and the produces a graph
-        using plotly
-        """
-        df = pd.read_csv(path + "/panel_" + agent + ".csv")
-
-        print("start graph fn")
-        x_data = [[] for _ in range(params["num_" + agent + "s"])]
-        y_data = [[] for _ in range(params["num_" + agent + "s"])]
-
-        for i in range(len(df)):
-            name = df["name"][i]
-            number = int(name[4:])
-            x_data[number].append(df["round"][i])
-            y_data[number].append(df[graphing_variable][i])
-
-        data = []
-
-        for i in range(params["num_" + agent + "s"]):
-            data.append(go.Scatter(x=x_data[i],
-                                    y=y_data[i],
-                                    mode="lines"))
-
-        py.plot(data)
-        print("end graph fn")
-
-    def GraphFn_People(graphing_variable, agent):
-        """
-        function that takes in graphing variable as parameter and the produces a graph
-        using plotly
-        """
-        df = pd.read_csv(path + "/panel_" + agent + ".csv")
-
-        print("start graph fn")
-        x_data = [[]]
-        y_data = [[]]
-
-        for i in range(len(df)):
-            name = df["name"][i]
-            number = int(name[4:])
-            x_data[number].append(df["round"][i])
-            y_data[number].append(df[graphing_variable][i])
-
-        data = []
-
-        data.append(go.Scatter(x=x_data[0],
-                                y=y_data[0],
-                                mode="lines"))
-
-    #GraphFn("money", "farm")
-    #GraphFn_People("money", "people")
+def main(params):
+    """
+    runs the whole simulation
+
+    Returns: the path of the logs, a DataFrame of the daily aggregates for the fast engine, up to the
+             steady state with a convergence_test, which is described in its attrs['converged']
+    """
+    if params['engine'] == 'fast':
+        days = pd.DataFrame(list(simulate(params))).set_index('round')
+        if 'converged' in days:
+            days.attrs['converged'] = days.pop('converged').dropna().iloc[0]
+        return days
+    for day in simulate(params):
+        pass
+    return day['path']
 
 if __name__ == '__main__':
     main(params)
\ No newline at end of file
@@ -1,11 +1,19 @@
 import abce
+from logsink import SinkLogging
+from checkpoint import Checkpointing
+from agent_state import SharedParameters
+from ledger import LedgerAccount
+import tracing
+from demand import price_index, ces_demand
+import price_board
 
 
-class People(abce.Agent):
+class People(Checkpointing, SharedParameters, LedgerAccount, SinkLogging, abce.Agent):
 
     """
     People:
-    - Represents the total american population
+    - Represents a cohort of the american population, the population is split into num_cohorts cohorts with
+    their own money, income and wage acceptance (see cohorts.py)
     - Gains units of labour equal to their population at the start of each day
     - Destroys all excess labour at the end of each day
     - Buys produce from firms
@@ -13,32 +21,37 @@ class People(abce.Agent):
         - If they can't afford to meet their demand, they buy as much produce ss possible
     - Offers to sell labour to every firm at the start of each day
         - Maximum labour offered is proportional to firm wages
-        - Sends a message to the firm each round telling the firm their offer
-        - If they have less labour than the maximum labour offered, they will sell ll their labour
-        - Otherwise, they will sell the maximum
+        - The labour market is cleared for all cohorts at once by labour_market.clear_vacancies
+    - Receives wages in proportion to their share in every workforce and dividends in proportion to dividend_share
     """
 
-    def init(self, people_money, population, l, num_firms, wage_acceptance, maintenance_goods, reserve,
-             num_farms, days_harvest, **_):
-        self.name = "people"
-        self.population = population
-        self.create('money', people_money)
+    def init(self, cohort_money, cohort_population, cohort_wage_acceptance, dividend_share, l, num_firms,
+             maintenance_goods, reserve, num_farms, days_harvest, board, run_id, trace, **_):
+        tracing.set_level(trace)
+        self.population = cohort_population
+        self.create('money', cohort_money)
+        self.dividend_share = dividend_share
+        self.income = 0
         self.produce = 0
-        self.num_firms = num_firms
-        self.price_dict = {}
-        self.price_dict_farm = {}
-        self.l = l
-        self.wage_acceptance = wage_acceptance
-        self.maintenance_goods = maintenance_goods
+        price_board.attach(board)
+        self.wage_acceptance = cohort_wage_acceptance
         self.reserve = reserve
-        self.num_farms = num_farms
-        self.days_harvest = days_harvest
+        self.share(run_id,
+                   l=l,
+                   num_firms=num_firms,
+                   maintenance_goods=maintenance_goods,
+                   num_farms=num_farms,
+                   days_harvest=days_harvest)
 
     def create_labour(self):
         """
         creates labour to add to the people's inventory
         """
         self.create('workers', self.population)
+        self.income = 0
+
+    def publish_labour_supply(self):
+        return self.name, self.population, self.wage_acceptance, self.dividend_share
 
     def destroy_unused_labor(self):
         """
@@ -47,89 +60,87 @@ class People(abce.Agent):
         self.destroy('workers')
 
     def consumption(self):
+        """
+        consumes all produce
+
+        Returns: (name, produce consumed)
+        """
         #self.log("consumption", self["produce"])
-        self.destroy("produce")
+        consumed = self["produce"]
+        self.destroy("produce", consumed)
+        return self.name, consumed
 
     def find_q(self):
         """
-        returns the parameter q as defined in the C-D utility function
+        returns the parameter q as defined in the C-D utility function, computed once a day per process
         """
-        L = self.l
-        q = 0
-        for id in range(self.num_firms):
-            q += self.price_dict[('firm', id)] ** (L / (L - 1))
-        q = float(q) ** ((L - 1) / L)
-        return q
+        return price_board.cached('firm', ('q', self.l), lambda prices: price_index(prices, self.l))
 
 
     def find_q_farms(self):
         """
         returns the parameter q as defined in the C-D utility function
         """
-        L = self.l
-        q = 0
-        for id in range(self.num_farms):
-            q += self.price_dict[('farm', id)] ** (L / (L - 1))
-        q = float(q) ** ((L - 1) / L)
-        return q
+        return price_board.cached('farm', ('q', self.l), lambda prices: price_index(prices, self.l))
 
     def buy_goods(self):
         """
-        Calculates the demand from each firm and makes buy offers for produce of this amount at this value, or as much
-        as the people can afford
+        Calculates the demand from each firm and bids for produce of this amount at this value, the bids are
+        cleared by goods_market.clear_bids
 
         Args:   q, l parameters as defined in the C-D utility function
                 firm_price = the price the firm is selling the goods for
                 firm_id = the number of the firm the people are trading with
+
+        Returns: (name, demand vector, price vector), the vectors are ordered by firm id
         """
+        prices = price_board.prices('firm')
         q = self.find_q()
         #self.log('q', q)
 
-        demand_list = []
-        l = self.l
-
         I = self.not_reserved('money')
-        for firm in range(self.num_firms):  # fix systematic advantage for 0 firm
-            firm_price = float(self.price_dict['firm', firm])
-            demand = (I / q) * (q / firm_price) ** (1 / (1 - l))
-            self.buy(('firm', firm), good='produce', quantity=demand, price=firm_price)
-            demand_list.append(demand)
+        demand_list = ces_demand(prices, I, self.l, q)
         #self.log('total_demand', sum(demand_list))
-        return demand_list
+        return self.name, demand_list, prices
 
-    def send_workers(self, vacancies_list):
+    def receive_goods(self, settlement, good):
         """
-        Calculates the supply of employees for each firm, gives this amount of labour, or as much labour as possible
-        to each firm
+        receives the goods bought on the market and pays for them
 
-        Args:   sum_wages = the sum of the wages offered from every firm
-                firm_wage = the wage the firm is offering
-                firm_id = the number of the firm the people are trading with
+        Args:   settlement = the settlement of goods_market.clear_bids
+                good = the good that was traded
         """
-        wages = [vacancy["wage"] for vacancy in vacancies_list]
+        bought, spent = settlement['bought'].get(self.name, (0, 0))
+        self.create(good, bought)
+        self.destroy('money', min(spent, self['money']))
 
-        max_wage = max(wages)
-
-        distances = [1 - ((max_wage - wage) / max_wage) ** self.wage_acceptance for wage in wages]
+    def send_workers(self, hired):
+        """
+        gives up the labour hired by the firms and farms, the allocation of the labour is computed by
+        labour_market.clear_vacancies
 
-        norm = sum(distances)
+        Args:   hired = dictionary from cohort name to the number of workers hired from the cohort
+        """
+        self.destroy('workers', hired[self.name])
 
-        for vacancies, dist in zip(vacancies_list, distances):
-            firm_or_farm = vacancies["name"]
+    def receive_income(self, incomes):
+        """
+        receives the cohort's share of the wages and dividends, see cohorts.household_income
+        """
+        self.create('money', incomes[self.name])
+        self.income += incomes[self.name]
 
-            willing_workers = self.population / norm * dist
-            #print(firm_or_farm, willing_workers)
-            if vacancies["number"] <= willing_workers:
-                self.send(firm_or_farm, 'max_employees', willing_workers)
-                self.give(firm_or_farm, good='workers', quantity=vacancies["number"])
-            else:
-                self.give(firm_or_farm, good='workers', quantity=willing_workers)
+    def snapshot(self):
+        return self["money"], self.income
 
     def print_possessions(self):
         """
         prints possessions and logs money of a person agent
         """
-        print('    ' + self.group + str(dict(self.possessions())))
+        if tracing.debugging:
+            tracing.debug('    %s %s', self.group, self.possessions())
+        self.log("money", self["money"])
+        self.log("income", self.income)
         #self.log("money", self["money"])
         #self.log("workers", self["workers"])
 
@@ -145,46 +156,39 @@ class People(abce.Agent):
         """
         return self["produce"]
 
-    def get_prices(self):
-        """
-        reads the messages from the firms and creates a price list
+    def buy_farm_goods(self):
         """
-        price_msg = self.get_messages("price")
-        for msg in price_msg:
-            self.price_dict[msg.sender] = msg.content
-        return self.price_dict
+        Bids for farm goods when the people hold less than their maintenance and reserve, the bids are cleared
+        by goods_market.clear_bids
 
-    def buy_farm_goods(self):
+        Returns: (name, demand vector, price vector) ordered by farm id, or None when no farm goods are needed
+        """
         if self["farm_goods"] < self.population * (self.maintenance_goods + self.reserve):
+            prices = price_board.prices('farm')
             q = self.find_q_farms()
             self.log('q', q)
 
-            demand_list = []
-            demand_list_norm = []
-            l = self.l
-
             I = self.not_reserved('money')
-            for farm in range(self.num_farms):
-                goods_price = float(self.price_dict['farm', farm])
-                demand = (I / q) * (q / goods_price) ** (1 / (1 - l))
-                self.buy(('farm', farm), good='farm_goods', quantity=demand, price=goods_price)
-                demand_list.append(demand)
-            for n in range(len(demand_list)):
-                demand_list_norm.append(demand_list[n] * (self.population * (self.maintenance_goods + self.reserve) - self["farm_goods"]) / sum(demand_list))
-            #self.log('total_demand_farm', sum(demand_list_norm))
-            print('total demand farm', demand_list_norm)
-            return demand_list_norm
+            demand_list = ces_demand(prices, I, self.l, q)
+            if tracing.debugging:
+                demand_list_norm = demand_list * (self.population * (self.maintenance_goods + self.reserve)
+                                                  - self["farm_goods"]) / demand_list.sum()
+                tracing.debug('total demand farm %s', demand_list_norm)
+            return self.name, demand_list, prices
 
     def consume_farm_goods(self):
         """
         Each person consumes the farm goods they must consume per day
+
+        Returns: (name, farm goods consumed)
         """
+        consumed = 0
         if self["farm_goods"] > self.maintenance_goods * self.population:
-            self.destroy("farm_goods", self.maintenance_goods * self.population)
+            consumed = self.maintenance_goods * self.population
         elif 0 < self["farm_goods"] < self.maintenance_goods * self.population:
-            self.destroy("farm_goods")
-        else:
-            pass
+            consumed = self["farm_goods"]
+        self.destroy("farm_goods", consumed)
+        return self.name, consumed
 
     def find_reserve(self):
         """
@@ -0,0 +1,98 @@
+"""
+The daily schedule as a graph of phases.
+
+A phase is one step of the day with the resources it reads and writes: agent groups ('firms',
+'people', ...), values of the day in the context ('allocation', 'bids', ...) and other shared state
+('prices.firm'). Two phases conflict when one writes what the other reads or writes. A phase depends
+on every earlier phase it conflicts with, so running the phases in any order that respects the
+dependencies gives the same result as running them one after the other as declared.
+
+run_day runs the phases of a day in declaration order and checks at runtime that every phase only
+touches the context entries it declared, an undeclared access raises PhaseConflict. The graph is the
+checked contract of the schedule: levels() shows which phases are independent of each other.
+"""
+
+
+class PhaseConflict(Exception):
+    pass
+
+
+class Phase:
+    """
+    Args:   name = the name of the phase
+            run = function of the context that runs the phase
+            reads, writes = the resources the phase reads and writes
+            when = function of the context, the phase is skipped on the days it returns False; it is
+                   evaluated when the dependencies are done and may only read declared resources
+    """
+    def __init__(self, name, run, reads=(), writes=(), when=None):
+        self.name = name
+        self.run = run
+        self.reads = frozenset(reads)
+        self.writes = frozenset(writes)
+        self.when = when
+
+    def __repr__(self):
+        return 'Phase(%s)' % self.name
+
+
+def conflict(first, second):
+    return bool(first.writes & (second.reads | second.writes) or second.writes & first.reads)
+
+
+class PhaseGraph:
+    def __init__(self, phases):
+        self.phases = list(phases)
+        names = [phase.name for phase in self.phases]
+        assert len(set(names)) == len(names), 'phase names must be unique'
+        self.dependencies = {phase.name: frozenset(earlier.name for earlier in self.phases[:i]
+                                                   if conflict(earlier, phase))
+                             for i, phase in enumerate(self.phases)}
+
+    def levels(self):
+        """
+        returns the phases grouped into waves, the phases of a wave only depend on earlier waves
+        """
+        level = {}
+        for phase in self.phases:
+            level[phase.name] = 1 + max((level[name] for name in self.dependencies[phase.name]), default=-1)
+        waves = [[] for _ in range(max(level.values(), default=-1) + 1)]
+        for phase in self.phases:
+            waves[level[phase.name]].append(phase.name)
+        return waves
+
+
+class CheckedContext:
+    """
+    the view of the context of the day that a phase gets, it only allows the declared accesses
+    """
+    def __init__(self, context, phase):
+        self._context = context
+        self._phase = phase
+
+    def __getitem__(self, key):
+        if key not in self._phase.reads and key not in self._phase.writes:
+            raise PhaseConflict('%s reads %r, which it does not declare' % (self._phase.name, key))
+        return self._context[key]
+
+    def __setitem__(self, key, value):
+        if key not in self._phase.writes:
+            raise PhaseConflict('%s writes %r, which it does not declare' % (self._phase.name, key))
+        self._context[key] = value
+
+
+def _run(phase, context):
+    checked = CheckedContext(context, phase)
+    if phase.when is None or phase.when(checked):
+        phase.run(checked)
+
+
+def run_day(graph, context):
+    """
+    runs the phases of one day one after the other in declaration order
+
+    Args:   graph = the PhaseGraph of the day
+            context = dictionary with the resources of the phases, the phases update it
+    """
+    for phase in graph.phases:
+        _run(phase, context)
@@ -0,0 +1,72 @@
+import os
+from logsink import read_panel
+
+
+def agent_ids(panel):
+    """
+    returns the agent number of every row of a panel, parsed from the names ('firm12' -> 12) in one pass
+    """
+    return panel['name'].astype(str).str.extract(r'(\d+)\D*$', expand=False).fillna(0).astype(int)
+
+
+def pivot_panel(panel, variable):
+    """
+    turns a panel into a (round x agent) table of one logged variable
+    """
+    table = panel.assign(agent=agent_ids(panel)).pivot_table(index='round', columns='agent',
+                                                             values=variable, aggfunc='last')
+    return table.sort_index()
+
+
+def plot_html(table, title, filename):
+    """
+    writes a self-contained html file with one line per agent, plotly.js is embedded so that
+    the file can be opened without an internet connection
+    """
+    import plotly.graph_objs as go
+    from plotly.offline import plot
+
+    data = [go.Scatter(x=table.index, y=table[agent], mode="lines", name=str(agent))
+            for agent in table.columns]
+    plot(go.Figure(data=data, layout=go.Layout(title=title)), filename=filename,
+         auto_open=False, include_plotlyjs=True)
+
+
+def plot_png(table, title, filename):
+    """
+    writes a png file with one line per agent
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    figure, axes = plt.subplots(figsize=(12, 6))
+    axes.plot(range(len(table)), table.to_numpy(), linewidth=0.8)
+    axes.set_title(title)
+    axes.set_xlabel('day')
+    figure.savefig(filename, dpi=100)
+    plt.close(figure)
+
+
+def report(path, graphs, directory=None, kind='html'):
+    """
+    writes one offline graph per logged variable and agent group
+
+    Args:   path = the path of the simulation
+            graphs = list of (agent group, variable) pairs, e.g. [('farm', 'money'), ('firm', 'price')]
+            directory = where the graphs are written, defaults to path
+            kind = 'html' or 'png'
+
+    Returns: the list of files written
+    """
+    directory = directory or path
+    plotter = {'html': plot_html, 'png': plot_png}[kind]
+    panels = {}
+    files = []
+    for group, variable in graphs:
+        if group not in panels:
+            panels[group] = read_panel(path, group)
+        filename = os.path.join(directory, '%s_%s.%s' % (group, variable, kind))
+        plotter(pivot_panel(panels[group], variable), '%s %s' % (group, variable), filename)
+        files.append(filename)
+    return files
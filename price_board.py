@@ -0,0 +1,169 @@
+"""
+Shared board of the current prices of the sellers.
+
+Instead of sending a price envelope to every consumer group every day, every seller writes its price
+into its own slot of one array and the consumers read the prices of a seller group as a numpy vector
+without a copy. With processes > 1 the array lives in shared memory, so no price is pickled between
+processes. Every seller group has a version that main bumps with publish once all sellers of the group
+have posted (the group call is the barrier), consumers cache what they derive from the prices, such as
+the price index, per version.
+
+The board is created once by main, the agents get its spec as a parameter and attach to it once per
+process. The daily phases of main reach the prices of a seller group through a Prices handle in their
+context, so publishing and reading them are declared accesses that phases.CheckedContext checks. Like
+the log sinks the board is per process, the agents use it through the module functions post, prices
+and cached, so it is not part of their state and checkpoints do not copy it.
+"""
+import uuid
+import numpy as np
+from multiprocessing import shared_memory
+
+
+_boards = {}
+_current = None
+
+
+class StalePrices(Exception):
+    pass
+
+
+class PriceBoard:
+    def __init__(self, spec, buffer, memory=None, owner=False):
+        self.spec = spec
+        name, sizes, shared = spec
+        self.groups = list(sizes)
+        self.memory = memory
+        self.owner = owner
+        self.versions = np.ndarray(len(self.groups), dtype=np.int64, buffer=buffer)
+        self.slots = {}
+        offset = 8 * len(self.groups)
+        for group in self.groups:
+            self.slots[group] = np.ndarray(sizes[group], dtype=np.float64, buffer=buffer, offset=offset)
+            offset += 8 * sizes[group]
+        self.cache = {}
+
+    def post(self, group, id, price):
+        """
+        writes the price of a seller, called by the seller
+        """
+        self.slots[group][id] = price
+
+    def publish(self, group):
+        """
+        marks the prices of a group as complete for the day, called by main after the sellers posted
+        """
+        self.versions[self.groups.index(group)] += 1
+
+    def version(self, group):
+        return int(self.versions[self.groups.index(group)])
+
+    def prices(self, group):
+        """
+        returns the prices of a seller group ordered by id, a read-only view of the board
+        """
+        view = self.slots[group].view()
+        view.flags.writeable = False
+        return view
+
+    def cached(self, group, key, compute):
+        """
+        returns compute(prices) for the current version of the group's prices, computed once per process
+        and version
+        """
+        version = self.version(group)
+        entry = self.cache.get((group, key))
+        if entry is None or entry[0] != version:
+            entry = self.cache[group, key] = (version, compute(self.prices(group)))
+        return entry[1]
+
+    def close(self):
+        """
+        releases the board, the process that created a shared board also frees the shared memory
+        """
+        global _current
+        _boards.pop(self.spec[0], None)
+        if _current is self:
+            _current = None
+        if self.memory is not None:
+            self.slots = self.versions = None
+            try:
+                self.memory.close()
+            except BufferError:
+                pass  # views of the prices are still referenced, the mapping is released with them
+            if self.owner:
+                self.memory.unlink()
+
+
+class Prices:
+    """
+    the prices of one seller group on a board, the resource 'prices.<group>' of the daily phases
+
+    Args:   board = the PriceBoard
+            group = the seller group
+    """
+    def __init__(self, board, group):
+        self.board = board
+        self.group = group
+        self.day = None
+
+    def publish(self, day):
+        """
+        publishes the prices the sellers posted on a day
+        """
+        self.board.publish(self.group)
+        self.day = day
+
+    def current(self, day):
+        """
+        raises StalePrices unless the prices were published on the day, called before the buyers read them
+        """
+        if self.day != day:
+            raise StalePrices('the %s prices were last published on day %s, not on day %s'
+                              % (self.group, self.day, day))
+
+
+def create(sizes, shared=False):
+    """
+    creates a board
+
+    Args:   sizes = dictionary seller group -> number of sellers
+            shared = whether the board is in shared memory, needed when the agents run in several processes
+    """
+    size = 8 * (len(sizes) + sum(sizes.values()))
+    if shared:
+        memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        spec = (memory.name, dict(sizes), True)
+        board = PriceBoard(spec, memory.buf, memory, owner=True)
+    else:
+        spec = ('local_%s' % uuid.uuid4().hex, dict(sizes), False)
+        board = PriceBoard(spec, bytearray(size))
+    board.versions[:] = 0
+    _boards[spec[0]] = board
+    return attach(spec)
+
+
+def attach(spec):
+    """
+    attaches the process to the board of a spec, once per process, and makes it the current board
+    """
+    global _current
+    name, sizes, shared = spec
+    if name not in _boards:
+        if not shared:
+            raise KeyError('the price board %s is local to the process that created it' % name)
+        memory = shared_memory.SharedMemory(name=name)
+        _boards[name] = PriceBoard(spec, memory.buf, memory)
+    _current = _boards[name]
+    return _current
+
+
+def post(group, id, price):
+    _current.post(group, id, price)
+
+
+def prices(group):
+    return _current.prices(group)
+
+
+def cached(group, key, compute):
+    return _current.cached(group, key, compute)
@@ -0,0 +1,119 @@
+"""
+Opt-in instrumentation of the daily loop.
+
+PhaseProfiler.instrument wraps an agent group so that every group method call is recorded with its
+wall time, the number of calls and the number of results. Message and offer counts that are not
+visible from the results are added with PhaseProfiler.count: main counts the prices posted on the
+price board, and for the goods markets the reads of the board and the bids to single sellers. NullProfiler has the same interface
+and returns the groups unchanged, so a run without profiling pays nothing.
+"""
+import json
+import time
+from collections import defaultdict
+import pandas as pd
+
+
+class NullProfiler:
+    def instrument(self, group, label):
+        return group
+
+    def start_day(self, day):
+        pass
+
+    def count(self, phase, label, messages):
+        pass
+
+
+class PhaseProfiler:
+    def __init__(self):
+        self.day = 0
+        self.records = defaultdict(lambda: [0.0, 0, 0, 0])  # seconds, calls, results, messages
+
+    def instrument(self, group, label):
+        return InstrumentedGroup(group, label, self)
+
+    def start_day(self, day):
+        self.day = day
+
+    def record(self, phase, label, seconds, results):
+        record = self.records[self.day, phase, label]
+        record[0] += seconds
+        record[1] += 1
+        record[2] += results
+
+    def count(self, phase, label, messages):
+        """
+        adds the number of messages or offers sent in a phase
+        """
+        self.records[self.day, phase, label][3] += messages
+
+    def to_frame(self):
+        """
+        returns one row per day, phase and agent group
+        """
+        rows = [(day, phase, label, seconds, calls, results, messages)
+                for (day, phase, label), (seconds, calls, results, messages) in self.records.items()]
+        return pd.DataFrame(rows, columns=['day', 'phase', 'group', 'seconds', 'calls', 'results', 'messages'])
+
+    def totals(self):
+        """
+        returns the totals per phase and agent group over the run, the most expensive first
+        """
+        totals = self.to_frame().groupby(['phase', 'group'])[['seconds', 'calls', 'results', 'messages']].sum()
+        totals['share'] = totals['seconds'] / totals['seconds'].sum()
+        return totals.sort_values('seconds', ascending=False)
+
+    def write_csv(self, filename):
+        self.to_frame().to_csv(filename, index=False)
+
+    def write_json(self, filename):
+        with open(filename, 'w') as f:
+            json.dump({'days': self.to_frame().to_dict(orient='records'),
+                       'totals': self.totals().reset_index().to_dict(orient='records')}, f)
+
+    def write_folded(self, filename):
+        """
+        writes the totals as folded stacks (group;phase microseconds), the input format of flamegraph.pl
+        """
+        with open(filename, 'w') as f:
+            for (phase, label), row in self.totals().iterrows():
+                f.write('%s;%s %i\n' % (label, phase, row['seconds'] * 1e6))
+
+    def summary(self, width=50):
+        """
+        returns a text summary with one bar per phase and agent group, proportional to its time
+        """
+        lines = []
+        for (phase, label), row in self.totals().iterrows():
+            lines.append('%-30s %-20s %8.3fs %6i calls %8i msgs %s'
+                         % (phase, label, row['seconds'], row['calls'], row['messages'],
+                            '#' * int(round(row['share'] * width))))
+        return '\n'.join(lines)
+
+
+class InstrumentedGroup:
+    """
+    wraps an abce agent group, every method call is timed and recorded by the profiler
+    """
+    def __init__(self, group, label, profiler):
+        self._group = group
+        self._label = label
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        method = getattr(self._group, name)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            result = method(*args, **kwargs)
+            if result is not None and not isinstance(result, list):
+                result = list(result)
+            self._profiler.record(name, self._label, time.perf_counter() - start,
+                                  0 if result is None else sum(r is not None for r in result))
+            return result
+        return timed
+
+    def __add__(self, other):
+        if isinstance(other, InstrumentedGroup):
+            return InstrumentedGroup(self._group + other._group, self._label + '+' + other._label, self._profiler)
+        return InstrumentedGroup(self._group + other, self._label, self._profiler)
@@ -0,0 +1,172 @@
+"""
+Content-addressed cache of simulation results.
+
+A run is identified by the hash of its parameters, its seed and the source of the model modules, so
+an entry is found again for the same inputs in any notebook or sweep, and a change of the model
+source makes the old entries unreachable. Several workers of a sweep may share one cache: an entry
+that another worker evicts or replaces meanwhile is a miss, not an error. An entry holds the daily aggregates and optionally the
+panels of the agent groups, pickled and gzip-compressed in one directory per key. The cache is
+bounded in size: the entries used least recently are evicted first, a hit refreshes the entry.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import pandas as pd
+
+
+# modules next to main.py that run or analyse simulations but are not part of the model, every other
+# module is hashed into the source version
+TOOLING = ('benchmark.py', 'calibration.py', 'ensemble.py', 'postprocess.py', 'profiler.py', 'result_cache.py',
+           'scenarios.py', 'tracing.py')
+
+# parameters that change how a run is observed but not its results
+IGNORED_PARAMS = ('processes', 'profile', 'trace', 'graphs', 'graph_format', 'memory_report',
+                  'checkpoint_every', 'log_backend', 'log_format')
+
+PANEL_GROUPS = ('firm', 'farm', 'people')
+
+
+def model_sources(directory):
+    """
+    returns the names of the source files of the model, every module of the directory except TOOLING
+    """
+    return sorted(filename for filename in os.listdir(directory)
+                  if filename.endswith('.py') and filename not in TOOLING)
+
+
+def source_version(sources=None):
+    """
+    returns the hash of the source files of the model, by default of all model_sources
+    """
+    digest = hashlib.sha256()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for source in sources or model_sources(directory):
+        digest.update(source.encode())
+        with open(os.path.join(directory, source), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def run_key(params, seed, version=None):
+    """
+    returns the key of a run, the hash of its parameters, its seed and the model source version
+    """
+    relevant = {key: value for key, value in params.items() if key not in IGNORED_PARAMS and key != 'seed'}
+    text = json.dumps([relevant, seed, version or source_version()], sort_keys=True, default=repr)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Args:   directory = the directory the entries are stored in
+            max_bytes = the size the cache is evicted down to after every store
+    """
+    def __init__(self, directory='result_cache', max_bytes=2 * 1024 ** 3):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.version = source_version()
+        os.makedirs(directory, exist_ok=True)
+
+    def _entry(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key, panels=False):
+        """
+        returns the cached result {'aggregates': DataFrame, 'panels': {group: DataFrame}} or None
+        """
+        entry = self._entry(key)
+        if not os.path.isdir(entry) or (panels and not os.path.exists(os.path.join(entry, 'panels'))):
+            return None
+        try:
+            os.utime(entry)
+            result = {'aggregates': pd.read_pickle(os.path.join(entry, 'aggregates.pkl.gz')), 'panels': {}}
+            if panels:
+                for filename in sorted(os.listdir(os.path.join(entry, 'panels'))):
+                    result['panels'][filename.split('.')[0]] = pd.read_pickle(os.path.join(entry, 'panels', filename))
+        except FileNotFoundError:
+            # evicted or replaced by another worker while reading
+            return None
+        return result
+
+    def put(self, key, aggregates, panels=None):
+        """
+        stores a result, the entry is written to a temporary directory and renamed so that readers
+        never see a partial entry. When another worker stores the same key at the same time one of the
+        equal entries is kept.
+        """
+        staging = tempfile.mkdtemp(dir=self.directory, prefix='.staging_')
+        aggregates.to_pickle(os.path.join(staging, 'aggregates.pkl.gz'))
+        if panels is not None:
+            os.mkdir(os.path.join(staging, 'panels'))
+            for group, panel in panels.items():
+                panel.to_pickle(os.path.join(staging, 'panels', '%s.pkl.gz' % group))
+        shutil.rmtree(self._entry(key), ignore_errors=True)
+        try:
+            os.rename(staging, self._entry(key))
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+        self.evict()
+
+    def entries(self):
+        """
+        returns (last use, bytes, key) of every entry, the least recently used first
+        """
+        entries = []
+        for key in os.listdir(self.directory):
+            entry = self._entry(key)
+            if key.startswith('.') or not os.path.isdir(entry):
+                continue
+            try:
+                size = sum(os.path.getsize(os.path.join(root, filename))
+                           for root, _, filenames in os.walk(entry) for filename in filenames)
+                entries.append((os.path.getmtime(entry), size, key))
+            except FileNotFoundError:
+                continue
+        return sorted(entries)
+
+    def evict(self):
+        """
+        removes the least recently used entries until the cache fits into max_bytes
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(self._entry(key), ignore_errors=True)
+            total -= size
+
+    def run(self, params, seed=None, panels=False):
+        """
+        returns the result of a run from the cache, runs and stores it when it is not cached
+
+        A run without a seed cannot be reproduced, it is run and not stored.
+        """
+        seed = params['seed'] if seed is None else seed
+        if seed is None:
+            return simulate_result(params, panels)
+        key = run_key(params, seed, self.version)
+        result = self.get(key, panels)
+        if result is None:
+            result = simulate_result(dict(params, seed=seed), panels)
+            self.put(key, result['aggregates'], result['panels'] if panels else None)
+        return result
+
+
+def simulate_result(params, panels=False):
+    """
+    runs the simulation and returns {'aggregates': DataFrame, 'panels': {group: DataFrame}}
+    """
+    from main import main
+    from ensemble import daily_aggregates
+    from logsink import read_panel
+
+    if params['log_backend'] == 'none':
+        params = dict(params, log_backend='columnar')
+    output = main(dict(params, graphs=[]))
+    if params['engine'] == 'fast':
+        return {'aggregates': output, 'panels': {}}
+    return {'aggregates': daily_aggregates(output),
+            'panels': {group: read_panel(output, group) for group in PANEL_GROUPS} if panels else {}}
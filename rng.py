@@ -0,0 +1,45 @@
+"""
+Reproducible random streams.
+
+Every agent, or every group of agents in the array engines, gets its own numpy Generator derived from
+the seed of the run and its group and id with a SeedSequence spawn key. The streams do not depend on
+the order in which agents run or on the process they run in, so a run is reproduced bit for bit for
+any number of processes. Agents draw all random numbers of a rule in one call at its start, so that
+their streams stay aligned whichever branch the rule takes.
+"""
+import zlib
+import numpy as np
+
+
+def _group_key(group):
+    return zlib.crc32(group.encode())
+
+
+def fresh_seed():
+    """
+    returns a new random seed for a run that was started without one
+    """
+    return int(np.random.SeedSequence().entropy % 2 ** 32)
+
+
+def agent_stream(seed, group, id):
+    """
+    returns the random number generator of one agent
+    """
+    return np.random.Generator(np.random.PCG64(np.random.SeedSequence(seed, spawn_key=(_group_key(group), id))))
+
+
+def group_stream(seed, group):
+    """
+    returns the random number generator of a group of agents that draws for all its agents at once
+    """
+    return np.random.Generator(np.random.PCG64(np.random.SeedSequence(seed, spawn_key=(_group_key(group),))))
+
+
+def daily_draws(generator, number, draws):
+    """
+    draws all uniform random numbers a group needs for one rule in one call
+
+    Returns: a (draws x number) matrix, row i holds the i-th draw of every agent
+    """
+    return generator.random((draws, number))
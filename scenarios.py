@@ -0,0 +1,100 @@
+"""
+Scenario branches from one warm baseline.
+
+The baseline is run once up to the shock day in this process. Every scenario then continues from there
+in a forked process: the fork shares the state of the baseline copy-on-write, so the prefix is neither
+run again nor copied. A branch sends its shock into main.simulate and runs to num_days. A scenario is
+a dictionary:
+
+    {'name': 'productivity', 'params': {'productivity': 1.1}}
+    {'name': 'helicopter', 'money': 100000}
+
+'params' changes parameters the agents keep (see agent_state.SharedParameters.set_parameters), 'money'
+gives money to the people, split among the cohorts like the dividends. The agents run in this process,
+so branching needs processes=1 and the fork start method.
+"""
+import itertools
+import multiprocessing
+import pandas as pd
+
+
+_baseline = None
+
+
+def apply_shock(scenario):
+    """
+    returns the shock of a scenario, the function main.simulate applies to the agent groups
+    """
+    def shock(groups, context):
+        if scenario.get('params'):
+            for group in groups.values():
+                group.set_parameters(**scenario['params'])
+            context['households'] = list(groups['people'].publish_labour_supply())
+        if scenario.get('money'):
+            incomes = {name: scenario['money'] * share for name, _, _, share in context['households']}
+            groups['people'].receive_income(incomes)
+            context['ledger'].record('source', list(incomes), 'money', list(incomes.values()))
+    return shock
+
+
+def _frame(rows):
+    return pd.DataFrame(rows).drop(columns=['path', 'converged'], errors='ignore').set_index('day')
+
+
+def _branch(scenario):
+    """
+    continues the baseline of the forked process with the shock of a scenario
+    """
+    run, rows, days = _baseline
+    rows = list(rows)
+    try:
+        rows.append(run.send(apply_shock(scenario)))
+        rows.extend(itertools.islice(run, days - 1))
+    finally:
+        run.close()
+    return scenario['name'], _frame(rows)
+
+
+def branch(params, day, scenarios, processes=None):
+    """
+    runs the baseline up to a day and forks the scenarios from it
+
+    Args:   params = the parameters of the simulation, as in main.py
+            day = the first day that differs from the baseline, the shocks are applied at the end of the day before
+            scenarios = list of scenario dictionaries, see above
+            processes = the number of branches that run at the same time, None uses all cores
+
+    Returns: a DataFrame of the daily snapshots indexed by (scenario, day), every scenario with the shared
+             days before the shock, and the unshocked continuation as scenario 'baseline'
+    """
+    global _baseline
+    from main import simulate
+
+    if params['processes'] != 1 or params['engine'] != 'abce':
+        raise ValueError('scenario branches need the abce engine with processes=1')
+    if not 0 < day < params['num_days']:
+        raise ValueError('the shock day must be within the run')
+    names = [scenario['name'] for scenario in scenarios]
+    if 'baseline' in names or len(set(names)) != len(names):
+        raise ValueError('the scenario names must be unique and not baseline')
+    run = simulate(dict(params, log_backend='none', on_convergence='quiet'))
+    rows = list(itertools.islice(run, day))
+    _baseline = run, rows, params['num_days'] - day
+    try:
+        context = multiprocessing.get_context('fork')
+        with context.Pool(processes, maxtasksperchild=1) as pool:
+            results = dict(pool.imap(_branch, [{'name': 'baseline'}] + list(scenarios)))
+    finally:
+        _baseline = None
+        run.close()
+    return pd.concat(results, names=['scenario'])
+
+
+if __name__ == '__main__':
+    from main import params
+    result = branch(dict(params, num_days=1300, seed=0), 730,
+                    [{'name': 'productivity', 'params': {'productivity': 1.1}},
+                     {'name': 'wage_acceptance', 'params': {'wage_acceptance': 0.9}},
+                     {'name': 'maintenance_goods', 'params': {'maintenance_goods': 1.2}},
+                     {'name': 'money', 'money': 1000000}])
+    print(result.groupby('scenario')[['price', 'firm_wage', 'gdp', 'employment_ratio']].last())
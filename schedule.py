@@ -0,0 +1,81 @@
+"""
+Precompiled calendar of a run.
+
+compile_schedule turns the parameters into one integer plan before the run, so the daily loop does no
+date arithmetic: for every day its index, the abce time stamp (yymmdd), the day of the year, a mask of
+the phases of the farm year and the number of idle days the farms can fast-forward from that day
+(see farm_cycle.py). The loop iterates the rows from any start day, e.g. the day of a checkpoint.
+
+The first year has no harvest, the farms only grow crops in it.
+"""
+import numpy as np
+import pandas as pd
+
+
+START = '1/1/1880'
+
+HARVEST_START = 1  # the farms reset the days left of the harvest
+HARVEST = 2  # the farms harvest, hire and sell their goods
+GROWING = 4  # the farms grow crops and redistribute their profits
+
+
+class Schedule:
+    """
+    Args:   plan = structured array with one row per day, see compile_schedule
+            dates = the dates of the days as numpy datetime64
+    """
+    def __init__(self, plan, dates):
+        self.plan = plan
+        self.dates = dates
+
+    def __len__(self):
+        return len(self.plan)
+
+    def days(self, start=0):
+        """
+        returns the rows of the days from start on as tuples of python ints
+        (day, time, dayofyear, mask, idle)
+        """
+        return self.plan[start:].tolist()
+
+    def harvest_days(self):
+        return np.flatnonzero(self.plan['mask'] & HARVEST)
+
+
+def compile_schedule(num_days, harvest_start, days_harvest, start=START):
+    """
+    compiles the calendar of a run
+
+    Returns: a Schedule
+    """
+    dates = pd.date_range(start=start, periods=num_days, freq='D')
+    year = np.asarray(dates.year)
+    dayofyear = np.asarray(dates.dayofyear)
+    harvest = (harvest_start < dayofyear) & (dayofyear < harvest_start + days_harvest) & (year > year[0])
+    plan = np.zeros(num_days, dtype=[('day', np.int64), ('time', np.int64), ('dayofyear', np.int64),
+                                     ('mask', np.int64), ('idle', np.int64)])
+    plan['day'] = np.arange(num_days)
+    plan['time'] = (year % 100) * 10000 + np.asarray(dates.month) * 100 + np.asarray(dates.day)
+    plan['dayofyear'] = dayofyear
+    plan['mask'] = (np.where(dayofyear == harvest_start, HARVEST_START, 0) | np.where(harvest, HARVEST, GROWING))
+    plan['idle'] = idle_stretches(plan['mask'], dayofyear, year)
+    return Schedule(plan, dates.values)
+
+
+def idle_stretches(mask, dayofyear, year):
+    """
+    finds the stretches of days in which the farms only grow crops and redistribute profits
+
+    A stretch ends at the start of the harvest, at the end of the year and before the days whose divisor
+    (365 - day of year) is not positive.
+
+    Returns: integer vector, for every day the number of idle days from that day to the end of its stretch,
+             0 for the days that are not idle
+    """
+    idle = (mask & GROWING > 0) & (mask & HARVEST_START == 0) & (365 - dayofyear >= 1)
+    remaining = np.zeros(len(mask), dtype=np.int64)
+    for day in range(len(mask) - 1, -1, -1):
+        if idle[day]:
+            continuing = day + 1 < len(mask) and idle[day + 1] and year[day + 1] == year[day]
+            remaining[day] = 1 + (remaining[day + 1] if continuing else 0)
+    return remaining
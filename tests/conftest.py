@@ -0,0 +1,51 @@
+"""
+Shared helpers of the tests.
+
+The model modules are flat modules in the parent directory. make_agent builds an agent of a model class
+outside an abce simulation: the possessions, logging and naming of abce are replaced by a plain
+dictionary, so the daily rules of one agent can be stepped and compared directly.
+"""
+import os
+import sys
+import uuid
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class Possessions:
+    def __getitem__(self, good):
+        return self.goods[good]
+
+    def create(self, good, quantity):
+        self.goods[good] += quantity
+
+    def destroy(self, good, quantity=None):
+        if quantity is None:
+            quantity = self.goods[good]
+        assert quantity <= self.goods[good] + 1e-9, (good, quantity, self.goods[good])
+        self.goods[good] -= quantity
+
+    def not_reserved(self, good):
+        return self.goods[good]
+
+    def possessions(self):
+        return dict(self.goods)
+
+    def log(self, action_name, data_to_log):
+        self.logged[action_name] = data_to_log
+
+
+def make_agent(cls, group, id, **parameters):
+    """
+    returns an agent of an abce agent class that keeps its possessions in a dictionary, initialized
+    with cls.init(**parameters), the agent shares its parameters only with agents of the same run_id
+    """
+    parameters.setdefault('run_id', uuid.uuid4().hex)
+    parameters.setdefault('trace', None)
+    agent = object.__new__(type('Standalone' + cls.__name__, (Possessions, cls), {}))
+    agent.group, agent.id, agent.name = group, id, (group, id)
+    agent.goods = defaultdict(float)
+    agent.logged = {}
+    agent.init(**parameters)
+    return agent
@@ -0,0 +1,31 @@
+import pickle
+
+import pytest
+
+from agent_state import SharedParameters
+
+
+class Agent(SharedParameters):
+    def __init__(self, group, run_id, **parameters):
+        self.group = group
+        self.money = 0
+        self.share(run_id, **parameters)
+
+
+def test_simulations_keep_their_own_parameters():
+    first = [Agent('firm', 'first', wage_increment=0.01) for _ in range(2)]
+    second = Agent('firm', 'second', wage_increment=0.05)
+    assert [agent.wage_increment for agent in first] == [0.01, 0.01]
+    assert second.wage_increment == 0.05
+    first[0].set_parameters(wage_increment=0.02, money=7, unknown=1)
+    assert [agent.wage_increment for agent in first] == [0.02, 0.02]
+    assert second.wage_increment == 0.05
+    assert first[0].money == 7 and first[1].money == 0
+    assert 'wage_increment' not in vars(first[0])
+    with pytest.raises(AttributeError):
+        first[0].unknown
+
+
+def test_agents_pickle_with_their_parameters():
+    agent = pickle.loads(pickle.dumps(Agent('farm', 'run', land=1000)))
+    assert agent.land == 1000
@@ -0,0 +1,44 @@
+from collections import defaultdict
+
+import pytest
+
+from conftest import Possessions
+from checkpoint import Checkpointing
+
+
+class Agent(Possessions, Checkpointing):
+    def __init__(self, money):
+        self.name = ('people', 0)
+        self.goods = defaultdict(float, money=money, labour=5.0)
+        self._abce_attributes = set(self.__dict__) | {'_abce_attributes'}
+
+
+def test_set_state_restores_the_exact_balances():
+    agent = Agent(1000.0)
+    agent.set_state({('people', 0): {'attributes': {'income': 3.5}, 'possessions': {'money': 20.35720158711606},
+                                    'messages': {}}})
+    assert agent['money'] == 20.35720158711606
+    assert agent['labour'] == 0
+    assert agent.income == 3.5
+
+
+def same(first, second):
+    """
+    bit-for-bit equality, nan equals nan
+    """
+    return first == second or (first != first and second != second)
+
+
+def test_resumed_run_equals_the_continuous_run():
+    pytest.importorskip('abce')
+    from main import params, simulate
+
+    parameters = dict(params, num_days=8, num_firms=3, num_farms=2, population=500, farmers_population=500,
+                      log_backend='none', checkpoint_every=4, seed=3)
+    continuous = list(simulate(parameters))
+    resumed = list(simulate(dict(parameters, resume_from='%s/checkpoint_4.pkl.gz' % continuous[0]['path'])))
+    assert len(resumed) == 4
+    for stepped, restored in zip(continuous[4:], resumed):
+        for key, value in stepped.items():
+            if key != 'path':
+                assert same(restored[key], value), (stepped['day'], key)
@@ -0,0 +1,66 @@
+import pytest
+
+abce = pytest.importorskip('abce')
+
+from conftest import make_agent
+import farm_cycle
+import logsink
+import price_board
+from farm import Farm
+from main import params
+
+
+class Recorder:
+    def __init__(self):
+        self.records = {}
+
+    def add(self, time, id, variable, value):
+        self.records[time, id, variable] = value
+
+    def flush(self):
+        pass
+
+
+def idle_farm(board, farmable_land, money):
+    farm = make_agent(Farm, 'farm', 0, board=board.spec, **params)
+    farm.farmable_land = farmable_land
+    farm.create('money', money)
+    return farm
+
+
+@pytest.mark.parametrize('farmable_land, money, dayofyear, days',
+                         [(0.2, 1500.0, 300, 40), (0.9, 800.0, 120, 60), (0.0, 0.0, 10, 200), (0.5, 2500.0, 364, 1)])
+def test_fast_forward_matches_the_days_stepped(farmable_land, money, dayofyear, days):
+    """
+    a fast-forwarded stretch gives the farm the same farmable_land and money, the farmers the same daily
+    transfers, the snapshots the same farm rows and the log the same records as grow_crops,
+    redistribute_profits, log_sales and print_possessions every day
+    """
+    board = price_board.create({'firm': 0, 'farm': 1})
+    times = list(range(100, 100 + days))
+    stepped, forwarded = idle_farm(board, farmable_land, money), idle_farm(board, farmable_land, money)
+    stepped_log = Recorder()
+    stepped.log = lambda variable, value: stepped_log.add(stepped.time, stepped.id, variable, value)
+    transfers, rows = [], []
+    for t, stepped.time in enumerate(times):
+        stepped.grow_crops()
+        transfers.append(stepped.redistribute_profits(days=365 - dayofyear - t)[1])
+        stepped.log_sales()
+        stepped.print_possessions()
+        rows.append(stepped.snapshot())
+
+    logsink._sinks['farm'] = forwarded_log = Recorder()
+    try:
+        stretch = farm_cycle.Stretch(0, [forwarded.fast_forward(days, 365 - dayofyear, times)])
+    finally:
+        del logsink._sinks['farm']
+
+    assert forwarded.farmable_land == pytest.approx(stepped.farmable_land, abs=1e-12)
+    assert forwarded['money'] == pytest.approx(stepped['money'], rel=1e-12)
+    assert [stretch.transfers[0]] * days == pytest.approx(transfers, rel=1e-12)
+    for day, row in enumerate(rows):
+        assert list(stretch.snapshot(day)[0]) == pytest.approx(row, rel=1e-12)
+    assert forwarded_log.records.keys() == stepped_log.records.keys()
+    for key, value in stepped_log.records.items():
+        assert forwarded_log.records[key] == pytest.approx(value, rel=1e-12), key
+    board.close()
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+abce = pytest.importorskip('abce')
+
+from conftest import make_agent
+import fast_firms
+import goods_market
+import price_board
+import rng
+from firm import Firm
+from main import params, simulate
+
+
+ACTIONS = {(None, None): fast_firms.NO_ACTION,
+           ('ideal_num_workers', '-'): fast_firms.FEWER_WORKERS,
+           ('price', '-'): fast_firms.LOWER_PRICE,
+           ('ideal_num_workers', '+'): fast_firms.MORE_WORKERS,
+           ('price', '+'): fast_firms.HIGHER_PRICE}
+
+# the engines are equivalent when the 90% confidence interval of the difference of their means lies
+# within MARGIN times the mean of the abce engine (two one-sided tests at 5%)
+MARGIN = 0.1
+SEEDS = range(8)
+
+
+def test_population_step_matches_firm_rules():
+    """
+    one firm run by the Firm rules and by a FirmPopulation of one firm, from the same state and with the
+    same random stream, stays identical day by day
+    """
+    parameters = dict(params, num_firms=1, population=100, seed=7)
+    board = price_board.create({'firm': 1, 'farm': 0})
+    firm = make_agent(Firm, 'firm', 0, board=board.spec, **parameters)
+    population = fast_firms.FirmPopulation(1, **parameters)
+    population.rng = rng.agent_stream(parameters['seed'], 'firm', 0)
+    for share, willing, demand in [(0.8, 60, 30.0), (1.0, 50, 400.0), (0.2, 70, 5.0), (1.0, 90, 0.0)]:
+        workers = share * firm.ideal_num_workers
+        firm.hire({'employers': {firm.name: (workers, willing)}})
+        population.hire(np.array([workers]), np.array([willing], dtype=float))
+        firm.production()
+        population.production()
+        firm.pay_workers()
+        population.pay_workers()
+        firm.pay_dividents()
+        population.pay_dividents()
+        prices = np.array([firm.price])
+        quantities = np.array([[demand]])
+        firm.sell_goods(goods_market.clear_bids([(('people', 0), quantities[0], prices)], [firm.publish_supply()]))
+        population.sell_goods(quantities, prices[None, :])
+        firm.determine_bounds([demand])
+        population.determine_bounds(np.array([demand]))
+        firm.determine_wage()
+        population.determine_wage()
+        firm.expand_or_change_price()
+        population.expand_or_change_price()
+        firm.destroy_unused_labor()
+        population.destroy_unused_labor()
+        firm.determine_profits()
+        population.determine_profits()
+
+        assert ACTIONS[firm.last_action] == population.last_action[0]
+        for variable in ('price', 'wage', 'ideal_num_workers', 'profit', 'profit_1'):
+            assert getattr(firm, variable) == pytest.approx(getattr(population, variable)[0], rel=1e-12), variable
+        assert firm['money'] == pytest.approx(population.money[0], rel=1e-12)
+        assert firm['produce'] == pytest.approx(population.produce[0], rel=1e-12)
+    board.close()
+
+
+def second_half_means(runs, column):
+    return np.array([run[column].iloc[len(run) // 2:].mean() for run in runs])
+
+
+def test_engines_equivalent_within_margin():
+    """
+    the fast engine reproduces the abce engine without harvest: for every variable the mean over the
+    second half of the run is equivalent across seeds within MARGIN
+    """
+    parameters = dict(params, num_firms=5, population=1000, num_days=400, days_harvest=0, log_backend='none',
+                      graphs=[])
+    abce_runs = [pd.DataFrame(list(simulate(dict(parameters, seed=seed)))) for seed in SEEDS]
+    fast_runs = [fast_firms.run(parameters, seed) for seed in SEEDS]
+    for column in ('price', 'firm_wage', 'firm_money'):
+        reference, fast = second_half_means(abce_runs, column), second_half_means(fast_runs, column)
+        difference = reference.mean() - fast.mean()
+        standard_error = np.sqrt(reference.var(ddof=1) / len(reference) + fast.var(ddof=1) / len(fast))
+        assert abs(difference) + 1.645 * standard_error <= MARGIN * abs(reference.mean()), column
@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+
+import cohorts
+import goods_market
+import labour_market
+from ledger import EXTERNAL, GOODS, Ledger, LedgerError, record_income, record_market
+
+FIRMS = [('firm', 0), ('firm', 1)]
+PEOPLE = [('people', 0), ('people', 1)]
+FARMS = [('farm', 0)]
+HOUSEHOLDS = [(name, 500, 1, 0.5) for name in PEOPLE]
+
+
+def opening():
+    balances = {name: {'money': 1000.0, 'produce': 0.0, 'farm_goods': 0.0} for name in FIRMS + PEOPLE + FARMS}
+    balances['farmers'] = {'money': 500.0, 'produce': 0.0, 'farm_goods': 0.0}
+    balances[FARMS[0]]['money'] = 3000.0
+    return balances
+
+
+def reported(balances):
+    return [(name, [goods[good] for good in GOODS]) for name, goods in balances.items()]
+
+
+def run_day(balances, book, record_consumption=True):
+    """
+    the flows of one harvest day, applied to the balances and recorded in the book
+    """
+    balances[FARMS[0]]['farm_goods'] += 100.0
+    book.record('source', FARMS, 'farm_goods', 100.0)
+    farm_bids = [(name, np.array([30.0 + 10 * i]), np.array([31.0])) for i, name in enumerate(PEOPLE)]
+    farm_settlement = goods_market.clear_bids(farm_bids, [{'name': FARMS[0], 'id': 0, 'price': 30.0,
+                                                           'quantity': balances[FARMS[0]]['farm_goods']}])
+    for name, (goods, money) in farm_settlement['bought'].items():
+        balances[name]['farm_goods'] += goods
+        balances[name]['money'] -= money
+    goods, money = farm_settlement['sold'][FARMS[0]]
+    balances[FARMS[0]]['farm_goods'] -= goods
+    balances[FARMS[0]]['money'] += money
+    record_market(book, farm_settlement, 'farm_goods')
+    book.record(FARMS, 'sink', 'farm_goods', balances[FARMS[0]]['farm_goods'])
+    balances[FARMS[0]]['farm_goods'] = 0.0
+    book.record(PEOPLE, 'sink', 'farm_goods', [25.0, 25.0])
+    for name in PEOPLE:
+        balances[name]['farm_goods'] -= 25.0
+
+    produced = {name: 40.0 + i for i, name in enumerate(FIRMS)}
+    for name, quantity in produced.items():
+        balances[name]['produce'] += quantity
+    book.record('source', list(produced), 'produce', list(produced.values()))
+
+    profits = {FARMS[0]: 5.0}
+    balances[FARMS[0]]['money'] -= 5.0
+    balances['farmers']['money'] += 5.0
+    book.record(list(profits), 'farmers', 'money', list(profits.values()))
+
+    vacancies = [{'name': name, 'number': 10, 'wage': 10 + i} for i, name in enumerate(FIRMS)]
+    allocation = labour_market.clear_vacancies(vacancies, HOUSEHOLDS)
+    wage_bills = {name: allocation['employers'][name][0] * vacancy['wage'] for name, vacancy in zip(FIRMS, vacancies)}
+    dividends = {name: 20.0 for name in FIRMS}
+    for name in FIRMS:
+        balances[name]['money'] -= wage_bills[name] + dividends[name]
+    for name, income in cohorts.household_income(allocation, wage_bills, sum(dividends.values()),
+                                                 HOUSEHOLDS).items():
+        balances[name]['money'] += income
+    record_income(book, allocation, wage_bills, dividends, HOUSEHOLDS)
+
+    prices = np.array([2.0, 3.0])
+    bids = [(name, np.array([15.0, 10.0 + i]), prices) for i, name in enumerate(PEOPLE + ['farmers'])]
+    offers = [{'name': name, 'id': i, 'price': prices[i], 'quantity': balances[name]['produce']}
+              for i, name in enumerate(FIRMS)]
+    settlement = goods_market.clear_bids(bids, offers)
+    for name, (goods, money) in settlement['bought'].items():
+        balances[name]['produce'] += goods
+        balances[name]['money'] -= money
+    for name, (goods, money) in settlement['sold'].items():
+        balances[name]['produce'] -= goods
+        balances[name]['money'] += money
+    record_market(book, settlement, 'produce')
+
+    consumed = {name: balances[name]['produce'] for name in PEOPLE + ['farmers']}
+    for name in consumed:
+        balances[name]['produce'] = 0.0
+    if record_consumption:
+        book.record(list(consumed), 'sink', 'produce', list(consumed.values()))
+
+
+def test_full_day_is_conserved():
+    balances = opening()
+    book = Ledger(reported(balances))
+    for day in range(3):
+        run_day(balances, book)
+        book.check(reported(balances), day)
+    assert book.net_flows().shape == (len(balances) + len(EXTERNAL), len(GOODS))
+
+
+def test_unrecorded_consumption_is_reported():
+    balances = opening()
+    book = Ledger(reported(balances))
+    run_day(balances, book, record_consumption=False)
+    with pytest.raises(LedgerError, match=r"day 0: \('people', 0\) has 0.0 produce"):
+        book.check(reported(balances), 0)
+
+
+def test_report_names_tuple_accounts():
+    book = Ledger(reported(opening()))
+    book.record_matrix(FIRMS, PEOPLE, 'money', np.array([[1.0, 2.0], [3.0, 4.0]]))
+    book.record(PEOPLE[0], 'sink', 'produce', 1.5)
+    report = book.report(PEOPLE[0])
+    assert list(report['from']) == [FIRMS[0], FIRMS[1], PEOPLE[0]]
+    assert list(report['to']) == [PEOPLE[0], PEOPLE[0], 'sink']
+    assert list(report['amount']) == [1.0, 3.0, 1.5]
+
+
+def test_default_run_checks_every_day():
+    pytest.importorskip('abce')
+    from main import params, simulate
+
+    days = list(simulate(dict(params, num_days=5, num_firms=3, num_farms=2, population=500, farmers_population=500,
+                              log_backend='none', seed=0)))
+    assert len(days) == 5
@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+import logsink
+from logsink import SinkLogging, read_panel
+
+
+class Logger(SinkLogging):
+    def __init__(self, group, id):
+        self.group = group
+        self.id = id
+        self.time = 0
+
+
+def run(path, log_backend, values):
+    agents = [Logger('firm', id) for id in range(2)]
+    for agent in agents:
+        agent.open_log(path=path, log_backend=log_backend)
+    for time, value in enumerate(values):
+        for agent in agents:
+            agent.time = time
+            agent.log('price', value + agent.id)
+    for agent in agents:
+        agent.flush_log()
+
+
+def test_second_run_logs_into_its_own_directory(tmp_path):
+    first, second = tmp_path / 'first', tmp_path / 'second'
+    first.mkdir()
+    second.mkdir()
+    run(str(first), 'columnar', [1, 2, 3])
+    run(str(second), 'columnar', [10, 20])
+    assert len(read_panel(str(first), 'firm')) == 6
+    panel = read_panel(str(second), 'firm')
+    assert sorted(panel['price']) == [10, 11, 20, 21]
+
+
+def test_csv_after_none_is_not_silenced(tmp_path):
+    run(str(tmp_path), 'none', [1])
+    assert isinstance(logsink._sinks['firm'], logsink.NullLog)
+    Logger('firm', 0).open_log(path=str(tmp_path), log_backend='csv')
+    assert 'firm' not in logsink._sinks
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_timeseries_run_is_read_from_the_store(tmp_path):
+    first, second = tmp_path / 'first', tmp_path / 'second'
+    first.mkdir()
+    second.mkdir()
+    run(str(first), 'timeseries', [1, 2, 3])
+    run(str(second), 'timeseries', [10, 20])
+    panel = read_panel(str(second), 'firm')
+    assert sorted(panel['price']) == [10, 11, 20, 21]
+    assert sorted(panel['name'].unique()) == ['firm0', 'firm1']
+    with pytest.raises(FileNotFoundError):
+        read_panel(str(first), 'firm')
+
+
+@pytest.mark.parametrize('log_backend', ['columnar', 'timeseries'])
+def test_agents_log_ahead(tmp_path, log_backend):
+    agents = [Logger('farm', id) for id in range(2)]
+    for agent in agents:
+        agent.open_log(path=str(tmp_path), log_backend=log_backend)
+    for agent in agents:
+        for time in (5, 6, 7):
+            agent.log_at(time, 'money', 10 * time + agent.id)
+    for agent in agents:
+        agent.time = 8
+        agent.log('money', 80 + agent.id)
+        agent.flush_log()
+    panel = read_panel(str(tmp_path), 'farm').sort_values(['round', 'name'])
+    assert list(panel['round']) == [5, 5, 6, 6, 7, 7, 8, 8]
+    assert list(panel['money']) == [50, 51, 60, 61, 70, 71, 80, 81]
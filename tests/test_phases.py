@@ -0,0 +1,36 @@
+import pytest
+
+import phases
+import price_board
+
+
+def test_prices_read_before_publishing_are_stale():
+    board = price_board.create({'firm': 2})
+    prices = price_board.Prices(board, 'firm')
+    with pytest.raises(price_board.StalePrices):
+        prices.current(0)
+    prices.publish(0)
+    prices.current(0)
+    assert board.version('firm') == 1
+    with pytest.raises(price_board.StalePrices):
+        prices.current(1)
+    board.close()
+
+
+def test_undeclared_price_access_is_a_conflict():
+    def bids(c):
+        c['prices.firm'].current(c['day'])
+
+    context = {'day': 0, 'prices.firm': None}
+    with pytest.raises(phases.PhaseConflict):
+        phases.run_day(phases.PhaseGraph([phases.Phase('bids', bids, reads={'day'})]), context)
+
+
+def test_farms_overlap_the_firms_outside_harvest():
+    pytest.importorskip('abce')
+    from main import daily_phases, params
+
+    waves = phases.PhaseGraph(daily_phases(params, [], harvest=False)).levels()
+    wave = {name: i for i, names in enumerate(waves) for name in names}
+    assert wave['grow_crops'] <= wave['hire_firms']
+    assert wave['farm_profits'] <= wave['production']
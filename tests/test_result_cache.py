@@ -0,0 +1,37 @@
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import result_cache
+from result_cache import ResultCache
+
+
+def test_source_version_hashes_the_model_modules():
+    directory = os.path.dirname(os.path.abspath(result_cache.__file__))
+    sources = result_cache.model_sources(directory)
+    assert {'main.py', 'firm.py', 'ledger.py', 'phases.py'} <= set(sources)
+    assert not set(result_cache.TOOLING) & set(sources)
+
+
+def test_workers_storing_and_evicting_the_same_keys(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=0)
+    aggregates = pd.DataFrame({'price': range(100)})
+
+    def store(i):
+        cache.put('key%i' % (i % 3), aggregates, {'firm': aggregates})
+        cache.get('key%i' % ((i + 1) % 3), panels=True)
+
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(store, range(64)))
+    assert not [name for name in os.listdir(str(tmp_path)) if name.startswith('.staging_')]
+
+
+def test_entry_removed_while_reading_is_a_miss(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    cache.put('key', pd.DataFrame({'price': [1.0]}))
+    os.remove(os.path.join(str(tmp_path), 'key', 'aggregates.pkl.gz'))
+    assert cache.get('key') is None
+    shutil.rmtree(os.path.join(str(tmp_path), 'key'))
+    assert cache.entries() == []
@@ -0,0 +1,199 @@
+"""
+In-memory time-series store of the logged variables.
+
+Every logged variable of an agent group is kept as one (agent x day) numpy matrix, so one variable of
+all agents over time is a single slice instead of a scan of the long log. The store is filled during
+a run by the 'timeseries' log backend (see logsink.py), or from the logs of a finished run with
+from_panel, and answers queries by agent, by day range, across agents on one day and resampled to
+calendar periods. to_panel exports a group in the wide panel format of read_panel.
+
+The store lives in the process that runs the agents, with processes=1 that is the caller's process.
+Every run replaces the series of its groups and remembers its path, read_panel reads the panels of
+the last run from the store, so the graphs and reports of a run work without writing its logs.
+"""
+import os
+import numpy as np
+import pandas as pd
+
+
+class GroupSeries:
+    """
+    The matrices of one agent group. Rows are agent ids, columns are the kept days in the order their
+    rounds are first logged; both grow by doubling and missing values are nan.
+    """
+    def __init__(self, group, variables=None, every=1, path=None):
+        self.group = group
+        self.path = path
+        self.keep = None if variables is None else set(variables)
+        self.every = every
+        self.matrices = {}
+        self.rows, self.columns = 1, 64
+        self.rounds = np.empty(self.columns, dtype=np.int64)
+        self.agents = 0
+        self.days = 0
+        self.day_of = {}
+        self.column_of = {}
+
+    def reserve(self, agents, days):
+        """
+        makes room for the given number of agents and days
+        """
+        rows, columns = self.rows, self.columns
+        while rows < agents:
+            rows *= 2
+        while columns < days:
+            columns *= 2
+        if (rows, columns) != (self.rows, self.columns):
+            for variable, matrix in self.matrices.items():
+                grown = np.full((rows, columns), np.nan)
+                grown[:self.rows, :self.columns] = matrix
+                self.matrices[variable] = grown
+            rounds = np.empty(columns, dtype=np.int64)
+            rounds[:self.days] = self.rounds[:self.days]
+            self.rounds = rounds
+            self.rows, self.columns = rows, columns
+        self.agents = max(self.agents, agents)
+
+    def add(self, time, id, variable, value):
+        day = self.day_of.get(time)
+        if day is None:
+            day = self.day_of[time] = len(self.day_of)
+            if day % self.every == 0:
+                self.reserve(self.agents, self.days + 1)
+                self.rounds[self.days] = time
+                self.column_of[time] = self.days
+                self.days += 1
+        if day % self.every or (self.keep is not None and variable not in self.keep):
+            return
+        if id >= self.agents:
+            self.reserve(id + 1, self.days)
+        matrix = self.matrices.get(variable)
+        if matrix is None:
+            self.matrices[variable] = matrix = np.full((self.rows, self.columns), np.nan)
+        matrix[id, self.column_of[time]] = value
+
+    def flush(self):
+        pass
+
+    def matrix(self, variable):
+        """
+        returns the (agent x day) matrix of a variable, a view without copy
+        """
+        return self.matrices[variable][:self.agents, :self.days]
+
+
+class TimeSeriesStore:
+    """
+    Args:   start = the date of the first logged day, used to resample to calendar periods
+    """
+    def __init__(self, start='1/1/1880'):
+        self.start = pd.Timestamp(start)
+        self.groups = {}
+
+    def sink(self, group, variables=None, every=1, path=None):
+        """
+        returns a new log sink of a group for the run that logs to path, see logsink.SinkLogging.open_log
+        """
+        self.groups[group] = GroupSeries(group, variables, every, path)
+        return self.groups[group]
+
+    def logged(self, path, group):
+        """
+        returns whether the series of a group are the logs of the run with the given path
+        """
+        series = self.groups.get(group)
+        if series is None or series.path is None:
+            return False
+        return os.path.abspath(series.path) == os.path.abspath(path)
+
+    def variables(self, group):
+        return sorted(self.groups[group].matrices)
+
+    def _days(self, series, start, end):
+        return slice(start, series.days if end is None else end)
+
+    def series(self, group, variable, agents=None, start=None, end=None):
+        """
+        returns one variable as a (day x agent) DataFrame, for all agents or the given agent ids and for
+        the kept days from start to end (day indices, end excluded)
+        """
+        series = self.groups[group]
+        days = self._days(series, start, end)
+        rows = slice(None) if agents is None else np.asarray(agents)
+        values = series.matrix(variable)[rows, days]
+        columns = np.arange(series.agents) if agents is None else np.asarray(agents)
+        return pd.DataFrame(values.T, index=pd.Index(series.rounds[:series.days][days], name='round'),
+                            columns=pd.Index(columns, name='agent'))
+
+    def agent(self, group, agent, start=None, end=None):
+        """
+        returns all variables of one agent as a (day x variable) DataFrame
+        """
+        series = self.groups[group]
+        days = self._days(series, start, end)
+        return pd.DataFrame({variable: series.matrix(variable)[agent, days] for variable in self.variables(group)},
+                            index=pd.Index(series.rounds[:series.days][days], name='round'))
+
+    def cross_section(self, group, variable, day):
+        """
+        returns the values of a variable of all agents on one kept day (a day index, negative counts from the end)
+        """
+        series = self.groups[group]
+        return pd.Series(series.matrix(variable)[:, day], index=pd.Index(np.arange(series.agents), name='agent'),
+                         name=variable)
+
+    def resample(self, group, variable, rule='W', how='mean', agents=None):
+        """
+        resamples a variable to calendar periods (a pandas offset alias), rule='W' gives the weekly mean of
+        every agent
+        """
+        series = self.groups[group]
+        table = self.series(group, variable, agents)
+        table.index = self.start + pd.to_timedelta(np.arange(series.days) * series.every, unit='D')
+        return table.resample(rule).agg(how)
+
+    def to_panel(self, group):
+        """
+        exports a group in the wide panel format of read_panel (round, name, variables...)
+        """
+        series = self.groups[group]
+        variables = self.variables(group)
+        days, agents = np.meshgrid(np.arange(series.days), np.arange(series.agents), indexing='ij')
+        panel = pd.DataFrame({'round': series.rounds[:series.days][days.ravel()],
+                              'name': np.char.add(group, agents.ravel().astype(str))})
+        for variable in variables:
+            panel[variable] = series.matrix(variable).T.ravel()
+        return panel.dropna(subset=variables, how='all').reset_index(drop=True)
+
+    def write_panels(self, path):
+        """
+        writes every group as panel_<group>.csv, which read_panel and postprocess.report read
+        """
+        for group in self.groups:
+            self.to_panel(group).to_csv('%s/panel_%s.csv' % (path, group), index=False)
+
+
+def from_panel(path, groups, start='1/1/1880'):
+    """
+    builds a store from the logs of a finished run, csv or columnar
+    """
+    from logsink import read_panel
+    from postprocess import agent_ids
+
+    store = TimeSeriesStore(start)
+    for group in groups:
+        panel = read_panel(path, group)
+        ids = agent_ids(panel).to_numpy()
+        rounds, days = np.unique(panel['round'].to_numpy(), return_inverse=True)
+        series = store.sink(group)
+        series.reserve(ids.max() + 1 if len(ids) else 0, len(rounds))
+        series.rounds[:len(rounds)] = rounds
+        series.days = len(rounds)
+        for variable in panel.columns.drop(['round', 'name']):
+            matrix = np.full((series.rows, series.columns), np.nan)
+            matrix[ids, days] = pd.to_numeric(panel[variable], errors='coerce').to_numpy()
+            series.matrices[variable] = matrix
+    return store
+
+
+STORE = TimeSeriesStore()
@@ -0,0 +1,49 @@
+"""
+Leveled tracing of the simulation, replaces the debug prints of the agents.
+
+The functions debug, info and day are no-ops until set_level enables them, so tracing costs one
+empty function call when it is off. Call them through the module (tracing.debug(...)) so that
+set_level takes effect everywhere, and pass the values as arguments instead of formatting them.
+Arguments that cost more than a lookup to build are only built under `if tracing.debugging:`.
+
+The level is per process: main sets it, and the agents set it again in their init, so the agents in
+the worker processes of processes > 1 trace as well.
+"""
+import logging
+
+logger = logging.getLogger('economy')
+
+
+def _off(*_):
+    pass
+
+
+debug = info = day = _off
+debugging = False
+_level = None
+
+
+def set_level(level):
+    """
+    enables tracing at the given logging level ('DEBUG', 'INFO' or None to switch it off)
+    """
+    global debug, info, day, debugging, _level
+    if level == _level:
+        return
+    _level = level
+    debug = info = day = _off
+    debugging = False
+    if level is None:
+        return
+    logging.basicConfig(format='%(message)s')
+    logger.setLevel(level)
+    if logger.isEnabledFor(logging.INFO):
+        info = logger.info
+        day = _day
+    if logger.isEnabledFor(logging.DEBUG):
+        debug = logger.debug
+        debugging = True
+
+
+def _day(dayofyear, harvest):
+    logger.info('%i%s', dayofyear, '*' if harvest else '.')